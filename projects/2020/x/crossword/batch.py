@@ -0,0 +1,151 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from crossword import *
+from generate import CrosswordCreator
+
+
+def main():
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Generate many crosswords from one word list. "
+                    "Each job is a structure file and an optional seed, "
+                    "given as arguments or one per line on standard input."
+    )
+    parser.add_argument("words", help="word list, or a saved word index")
+    parser.add_argument("jobs", nargs="*", metavar="structure[:seed]",
+                        help="structures to fill; read from stdin if absent")
+    parser.add_argument("--format", choices=["text", "json"], default="text",
+                        help="print grids as text, or one JSON object a line")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--search", choices=CrosswordCreator.SEARCHES,
+                        default="backtrack", help="search strategy")
+    parser.add_argument("--images", metavar="DIRECTORY",
+                        help="also save each solved grid as an image here")
+    args = parser.parse_args()
+
+    lines = args.jobs if args.jobs else sys.stdin
+    jobs = (parse_job(line) for line in lines if line.strip())
+
+    if args.images:
+        os.makedirs(args.images, exist_ok=True)
+    for result in generate_all(args.words, jobs, args.processes,
+                               images=args.images, search=args.search):
+        if args.format == "json":
+            print(json.dumps(result), flush=True)
+        else:
+            print(f"{result['structure']} (seed {result['seed']}):")
+            if result["grid"] is None:
+                print("No solution.")
+            else:
+                for row in result["grid"]:
+                    print(row)
+            print(flush=True)
+
+
+def parse_job(line):
+    """
+    Parse a job of the form "structure" or "structure seed", where a
+    colon may also separate the seed. Return a (structure, seed) pair.
+    """
+    line = line.strip()
+    for separator in (" ", ":"):
+        structure, found, seed = line.rpartition(separator)
+        if found and seed.isdigit():
+            return structure.strip(), int(seed)
+    return line, None
+
+
+class Generator():
+
+    def __init__(self, index, images=None, **options):
+        """
+        Generate crosswords from a shared, already loaded `WordIndex`.
+        If `images` is a directory, each solved grid is also saved there
+        as an image. `options` are passed on to each `CrosswordCreator`.
+        """
+        self.index = index
+        self.images = images
+        self.options = options
+
+        # Parsed structures, by filename
+        self.crosswords = dict()
+
+    def generate(self, structure, seed=None, number=None):
+        """
+        Fill the crossword in `structure`, using `seed` to vary the result.
+        Return a dictionary with the structure, seed, and the solved grid
+        as a list of rows, or None for the grid if there is no solution.
+
+        Images are named after the structure and seed, prefixed with the
+        job `number` if given, so that jobs in one batch never share an
+        image even if they fill the same structure or structures of the
+        same name.
+        """
+        if structure not in self.crosswords:
+            self.crosswords[structure] = Crossword(structure, index=self.index)
+        crossword = self.crosswords[structure]
+
+        creator = CrosswordCreator(crossword, seed=seed, **self.options)
+        assignment = creator.solve()
+        result = {
+            "structure": structure,
+            "seed": seed,
+            "grid": (creator.lines(assignment)
+                     if assignment is not None else None)
+        }
+
+        if self.images and assignment is not None:
+            name = os.path.splitext(os.path.basename(structure))[0]
+            if seed is not None:
+                name += f"-{seed}"
+            if number is not None:
+                name = f"{number}-{name}"
+            result["image"] = os.path.join(self.images, f"{name}.png")
+            creator.save(assignment, result["image"])
+        return result
+
+
+# Generator used by this worker process
+worker_generator = None
+
+
+def worker_init(index, images, options):
+    """Set up the generator of a worker process, given the parent's index."""
+    global worker_generator
+    worker_generator = Generator(index, images, **options)
+
+
+def worker_generate(job):
+    """Generate one crossword in a worker process."""
+    return worker_generator.generate(*job)
+
+
+def generate_all(words, jobs, processes=1, images=None, **options):
+    """
+    Generate a crossword for each (structure, seed) pair in `jobs`, using
+    the word list or index in `words`, which is loaded and indexed once and
+    shared with any worker processes.
+    Yield results, as returned by `Generator.generate`, in job order.
+    """
+    index = WordIndex.open(words)
+    jobs = ((structure, seed, number)
+            for number, (structure, seed) in enumerate(jobs))
+    if processes <= 1:
+        generator = Generator(index, images, **options)
+        for job in jobs:
+            yield generator.generate(*job)
+        return
+
+    with multiprocessing.Pool(processes, initializer=worker_init,
+                              initargs=(index, images, options)) as pool:
+        yield from pool.imap(worker_generate, jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from crossword import *
+from generate import CrosswordCreator
+from instrument import Instrumentation
+
+# Slowdown, relative to a baseline run, reported as a regression
+REGRESSION = 1.25
+
+
+def main():
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crossword solver on generated grids."
+    )
+    parser.add_argument("--words", default="data/words2.txt",
+                        help="word list to draw dictionaries from")
+    parser.add_argument("--sizes", default="5,7,9",
+                        help="comma-separated grid sizes")
+    parser.add_argument("--densities", default="0.6,0.7",
+                        help="comma-separated fractions of open cells")
+    parser.add_argument("--vocabulary", default="1000,3000",
+                        help="comma-separated dictionary sizes")
+    parser.add_argument("--trials", type=int, default=2,
+                        help="grids to generate for each combination")
+    parser.add_argument("--propagation", default="mac,ac3",
+                        help="comma-separated propagation modes")
+    parser.add_argument("--variable-order", default="mrv",
+                        help="comma-separated variable orders")
+    parser.add_argument("--value-order", default="lcv,random",
+                        help="comma-separated value orders")
+    parser.add_argument("--search", default="backtrack,backjump",
+                        help="comma-separated search strategies")
+    parser.add_argument("--timeout", type=float, default=10,
+                        help="seconds allowed for each solve")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for grids and dictionaries")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare with results from an earlier run")
+    args = parser.parse_args()
+
+    configurations = configure(
+        args.propagation.split(","), args.variable_order.split(","),
+        args.value_order.split(","), args.search.split(",")
+    )
+    with open(args.words) as f:
+        words = sorted(set(f.read().upper().split()))
+
+    results = benchmark(
+        words,
+        sizes=[int(s) for s in args.sizes.split(",")],
+        densities=[float(d) for d in args.densities.split(",")],
+        vocabulary=[int(v) for v in args.vocabulary.split(",")],
+        configurations=configurations,
+        trials=args.trials,
+        timeout=args.timeout,
+        seed=args.seed
+    )
+
+    # Print results for each configuration
+    summary = summarize(results)
+    print(f"{'configuration':<32} {'runs':>5} {'solved':>7} {'unsat':>6} "
+          f"{'seconds':>9} {'nodes':>9}")
+    for name, row in summary.items():
+        print(f"{name:<32} {row['runs']:>5} {row['solved']:>7} "
+              f"{row['unsat']:>6} {row['seconds']:>9.3f} {row['nodes']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "summary": summary}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print("No regressions.")
+
+
+def configure(propagations, variable_orders, value_orders, searches):
+    """
+    Return solver configurations for every combination of options.
+    Backjumping only propagates before the search, so it is not combined
+    with MAC.
+    """
+    for name, options, allowed in [
+        ("propagation", propagations, CrosswordCreator.PROPAGATION),
+        ("variable order", variable_orders, CrosswordCreator.VARIABLE_ORDERS),
+        ("value order", value_orders, CrosswordCreator.VALUE_ORDERS),
+        ("search", searches, CrosswordCreator.SEARCHES)
+    ]:
+        for option in options:
+            if option not in allowed:
+                sys.exit(f"Unknown {name}: {option}")
+
+    configurations = []
+    for propagation, variable_order, value_order, search in itertools.product(
+        propagations, variable_orders, value_orders, searches
+    ):
+        if search == "backjump" and propagation == "mac":
+            continue
+        configurations.append({
+            "propagation": propagation,
+            "variable_order": variable_order,
+            "value_order": value_order,
+            "search": search
+        })
+    return configurations
+
+
+def configuration_name(configuration):
+    """Return a short name for a solver configuration."""
+    return " ".join([
+        configuration["propagation"],
+        configuration["variable_order"],
+        configuration["value_order"],
+        configuration["search"]
+    ])
+
+
+def generate_structure(size, density, rng):
+    """
+    Return the text of a random `size` by `size` crossword structure,
+    where each cell is open with probability `density`.
+    """
+    return "\n".join(
+        "".join("_" if rng.random() < density else "#" for _ in range(size))
+        for _ in range(size)
+    )
+
+
+def limit(creator, seconds):
+    """
+    Make the searches of `creator` raise TimeoutError once `seconds` pass.
+    """
+    deadline = time.perf_counter() + seconds
+    for phase in ("backtrack", "backjump"):
+        method = getattr(creator, phase)
+
+        def limited(*args, method=method, **kwargs):
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            return method(*args, **kwargs)
+
+        setattr(creator, phase, limited)
+
+
+def run(crossword, configuration, timeout):
+    """
+    Solve `crossword` with one configuration, returning its status
+    ("solved", "unsat" or "timeout"), seconds taken and nodes expanded.
+    """
+    creator = CrosswordCreator(crossword, **configuration)
+    instrumentation = Instrumentation().attach(creator)
+    limit(creator, timeout)
+
+    start = time.perf_counter()
+    try:
+        assignment = creator.solve()
+        if assignment is None:
+            status = "unsat"
+        elif creator.consistent(assignment):
+            status = "solved"
+        else:
+            raise RuntimeError("solver returned an inconsistent assignment")
+    except TimeoutError:
+        status = "timeout"
+    seconds = time.perf_counter() - start
+    return status, seconds, instrumentation.counts["nodes"]
+
+
+def benchmark(words, sizes, densities, vocabulary, configurations,
+              trials=1, timeout=10, seed=0):
+    """
+    Run every configuration on generated grids of each size and density,
+    filled from random dictionaries of each size drawn from `words`.
+    Return one result row per run.
+    """
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size, density, count in itertools.product(
+            sizes, densities, vocabulary
+        ):
+            for trial in range(trials):
+                structure = os.path.join(directory, "structure.txt")
+                with open(structure, "w") as f:
+                    f.write(generate_structure(size, density, rng))
+                index = WordIndex(rng.sample(words, min(count, len(words))))
+                crossword = Crossword(structure, index=index)
+
+                for configuration in configurations:
+                    status, seconds, nodes = run(
+                        crossword, dict(configuration, seed=seed), timeout
+                    )
+                    results.append({
+                        "size": size,
+                        "density": density,
+                        "vocabulary": count,
+                        "trial": trial,
+                        "variables": len(crossword.variables),
+                        "configuration": configuration_name(configuration),
+                        "status": status,
+                        "seconds": seconds,
+                        "nodes": nodes
+                    })
+    return results
+
+
+def summarize(results):
+    """
+    Return the number of runs, solved and unsatisfiable grids, total
+    seconds and total nodes for each configuration.
+    """
+    summary = dict()
+    for result in results:
+        row = summary.setdefault(result["configuration"], {
+            "runs": 0, "solved": 0, "unsat": 0, "seconds": 0.0, "nodes": 0
+        })
+        row["runs"] += 1
+        if result["status"] in ("solved", "unsat"):
+            row[result["status"]] += 1
+        row["seconds"] += result["seconds"]
+        row["nodes"] += result["nodes"]
+    return summary
+
+
+def compare(results, baseline):
+    """
+    Compare `results` with `baseline` results run with the same options.
+    Return a description of each run that no longer finishes, or that
+    became more than `REGRESSION` times slower or expanded more nodes.
+    Runs that timed out are only compared by whether they finished.
+    """
+    def key(result):
+        return (result["size"], result["density"], result["vocabulary"],
+                result["trial"], result["configuration"])
+
+    previous = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = "size {} density {} vocabulary {} trial {} ({})".format(
+            *key(result)
+        )
+        if old["status"] != "timeout" and result["status"] == "timeout":
+            regressions.append(f"{name}: now times out")
+        elif "timeout" in (old["status"], result["status"]):
+            continue
+        elif result["seconds"] > REGRESSION * max(old["seconds"], 0.01):
+            regressions.append(
+                f"{name}: {old['seconds']:.3f}s -> {result['seconds']:.3f}s"
+            )
+        elif result["nodes"] > REGRESSION * max(old["nodes"], 10):
+            regressions.append(
+                f"{name}: {old['nodes']} -> {result['nodes']} nodes"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
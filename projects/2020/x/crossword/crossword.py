@@ -1,3 +1,7 @@
+import os
+import pickle
+
+
 class Variable():
 
     ACROSS = "across"
@@ -35,9 +39,203 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class WordIndex():
+
+    # Version of the on-disk index format, bumped when it changes
+    VERSION = 1
+
+    # Character matching any letter in a pattern query
+    WILDCARD = "?"
+
+    def __init__(self, words):
+        """
+        Index a vocabulary by word length, position and letter.
+
+        Words of each length are given integer IDs, so a set of words of
+        one length can be stored as a bitset where bit `i` stands for the
+        word with ID `i`. For each length, position and letter, `masks`
+        holds the bitset of words with that letter at that position.
+        """
+        # Modification time and size of the word list, if read from a file
+        self.source = None
+
+        self.buckets = dict()
+        for word in sorted(set(words)):
+            self.buckets.setdefault(len(word), []).append(word)
+
+        self.masks = dict()
+        for length, bucket in self.buckets.items():
+            positions = [dict() for _ in range(length)]
+            for i, word in enumerate(bucket):
+                for k, letter in enumerate(word):
+                    positions[k].setdefault(letter, []).append(i)
+            self.masks[length] = [
+                {
+                    letter: WordIndex.bits(ids, len(bucket))
+                    for letter, ids in position.items()
+                }
+                for position in positions
+            ]
+        self.number()
+
+    def number(self):
+        """Assign each word its ID within the bucket for its length."""
+        self.ids = {
+            length: {word: i for i, word in enumerate(bucket)}
+            for length, bucket in self.buckets.items()
+        }
+
+    @classmethod
+    def open(cls, filename):
+        """
+        Return the index for the word list in `filename`.
+
+        The index is cached next to the word list in `filename + ".index"`
+        and reused on later runs for as long as the word list is unchanged.
+        `filename` may also name an index file directly.
+        """
+        if filename.endswith(".index"):
+            return cls.load(filename)
+
+        cache = filename + ".index"
+        stat = os.stat(filename)
+        source = (stat.st_mtime_ns, stat.st_size)
+        try:
+            index = cls.load(cache)
+            if index.source == source:
+                return index
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            pass
+
+        with open(filename) as f:
+            index = cls(f.read().upper().splitlines())
+        index.source = source
+        try:
+            index.save(cache)
+        except OSError:
+            pass
+        return index
+
+    @classmethod
+    def load(cls, filename):
+        """Load an index previously written with `save`."""
+        with open(filename, "rb") as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            raise ValueError(f"{filename} is not a word index")
+        index = cls.__new__(cls)
+        index.buckets = data["buckets"]
+        index.masks = data["masks"]
+        index.source = data["source"]
+        index.number()
+        return index
+
+    def save(self, filename):
+        """
+        Write the index to `filename`.
+
+        The index is written to a temporary file in the same directory and
+        then moved into place, so a reader never sees a partly written index.
+        """
+        data = {
+            "version": WordIndex.VERSION,
+            "source": self.source,
+            "buckets": self.buckets,
+            "masks": self.masks
+        }
+        temporary = f"{filename}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, filename)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def vocabulary(self):
+        """Return the set of all indexed words."""
+        return set(
+            word for bucket in self.buckets.values() for word in bucket
+        )
+
+    @staticmethod
+    def bits(ids, size):
+        """Return a bitset of `size` bits with the bits in `ids` set."""
+        array = bytearray((size + 7) // 8)
+        for i in ids:
+            array[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(array, "little")
+
+    def full(self, length):
+        """Return the bitset of all words of the given length."""
+        return (1 << len(self.buckets.get(length, []))) - 1
+
+    def letters(self, length, position):
+        """
+        Return a dictionary mapping each letter to the bitset of words of
+        `length` with that letter at `position`.
+        """
+        if length not in self.masks:
+            return dict()
+        return self.masks[length][position]
+
+    def mask(self, length, position, letter):
+        """Return the bitset of words with `letter` at `position`."""
+        return self.letters(length, position).get(letter, 0)
+
+    def pattern(self, pattern):
+        """
+        Return the bitset of words matching `pattern`, such as "C?T??",
+        where each `WILDCARD` stands for any letter.
+        """
+        length = len(pattern)
+        bitset = self.full(length)
+        for k, letter in enumerate(pattern.upper()):
+            if letter != WordIndex.WILDCARD:
+                bitset &= self.mask(length, k, letter)
+                if not bitset:
+                    break
+        return bitset
+
+    def match(self, pattern):
+        """Return the list of words matching `pattern`, in ID order."""
+        return self.decode(len(pattern), self.pattern(pattern))
+
+    def id(self, word):
+        """Return the ID of `word` among words of its length."""
+        return self.ids[len(word)][word]
+
+    def decode(self, length, bitset):
+        """Return the list of words of `length` in `bitset`, in ID order."""
+        bucket = self.buckets.get(length, [])
+        binary = bin(bitset)[:1:-1]
+        ids = []
+        i = binary.find("1")
+        while i != -1:
+            ids.append(i)
+            i = binary.find("1", i + 1)
+        return [bucket[i] for i in ids]
+
+
+class Overlaps(dict):
+    """
+    Overlaps between pairs of variables.
+    Only overlapping pairs are stored; looking up any other pair gives None.
+    """
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
-    def __init__(self, structure_file, words_file):
+    def __init__(self, structure_file, words_file=None, index=None):
+        """
+        Load a crossword structure and the vocabulary to fill it with.
+        The vocabulary is read from `words_file`, unless an already loaded
+        `WordIndex` is given as `index`.
+        """
 
         # Determine structure of crossword
         with open(structure_file) as f:
@@ -57,9 +255,8 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Save vocabulary list, indexed by length, position and letter
+        self.index = index if index is not None else WordIndex.open(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -104,30 +301,35 @@ class Crossword():
                             length=length
                         ))
 
+        # Map each cell to the variables passing through it, along with
+        # the index of the cell within each variable
+        cells = dict()
+        for variable in self.variables:
+            for k, cell in enumerate(variable.cells):
+                cells.setdefault(cell, []).append((variable, k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        self.overlaps = Overlaps()
+        adjacent = {variable: set() for variable in self.variables}
+        for entries in cells.values():
+            for v1, i in entries:
+                for v2, j in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (i, j)
+                        adjacent[v1].add(v2)
+        self.adjacent = {
+            variable: frozenset(neighbors)
+            for variable, neighbors in adjacent.items()
+        }
+
+    @property
+    def words(self):
+        """Set of all words in the vocabulary."""
+        return self.index.vocabulary()
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.adjacent[var]
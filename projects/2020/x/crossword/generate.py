@@ -1,20 +1,96 @@
-import sys
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import OrderedDict, deque
 
 from crossword import *
 
 
+class Restart(Exception):
+    """Raised when a search runs out of nodes and should start over."""
+
+
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    # Ways of propagating constraints: not at all, with AC-3 once before
+    # searching, or by maintaining arc consistency after every assignment
+    PROPAGATION = ("none", "ac3", "mac")
+
+    # Heuristics for choosing the next variable: fewest remaining values
+    # then highest degree, highest degree then fewest remaining values,
+    # or at random
+    VARIABLE_ORDERS = ("mrv", "degree", "random")
+
+    # Heuristics for ordering values: least constraining first, or at random
+    VALUE_ORDERS = ("lcv", "random")
+
+    # Search strategies: chronological backtracking, or conflict-directed
+    # backjumping with nogood learning and restarts
+    SEARCHES = ("backtrack", "backjump")
+
+    def __init__(self, crossword, propagation="mac",
+                 variable_order="mrv", value_order="lcv", seed=None,
+                 search="backtrack", nogood_limit=10000, restart_nodes=100):
         """
         Create new CSP crossword generate.
+
+        If `seed` is given, ties between equally good variables or values
+        are broken at random using that seed; otherwise they are broken in
+        a fixed order.
+
+        With `search` set to "backjump", constraints are only propagated
+        before the search (AC-3 for "mac"), at most `nogood_limit` failed
+        partial assignments are remembered, and the search restarts after
+        `restart_nodes` times the next term of the Luby sequence nodes.
         """
+        if propagation not in CrosswordCreator.PROPAGATION:
+            raise ValueError(f"unknown propagation: {propagation}")
+        if variable_order not in CrosswordCreator.VARIABLE_ORDERS:
+            raise ValueError(f"unknown variable order: {variable_order}")
+        if value_order not in CrosswordCreator.VALUE_ORDERS:
+            raise ValueError(f"unknown value order: {value_order}")
+        if search not in CrosswordCreator.SEARCHES:
+            raise ValueError(f"unknown search: {search}")
         self.crossword = crossword
+        self.propagation = propagation
+        self.variable_order = variable_order
+        self.value_order = value_order
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.shuffle = seed is not None
+        self.search = search
+        self.nogood_limit = nogood_limit
+        self.restart_nodes = restart_nodes
+
+        # Learned nogoods, least recently used first, and the nogoods
+        # containing each (variable, word) pair
+        self.nogoods = OrderedDict()
+        self.watches = dict()
+        self.index = crossword.index
+
+        # Each domain is a bitset over the IDs of words of the variable's
+        # length (see `WordIndex`), kept in grid order so that searches
+        # are repeatable
         self.domains = {
-            var: self.crossword.words.copy()
-            for var in self.crossword.variables
+            var: self.index.full(var.length)
+            for var in sorted(
+                self.crossword.variables,
+                key=lambda v: (v.i, v.j, v.direction)
+            )
         }
 
+        # Letter counts for each (variable, position), along with the
+        # domain they were counted for (see `letter_counts`)
+        self.counts = dict()
+
+    def words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return self.index.decode(var.length, self.domains[var])
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -35,62 +111,54 @@ class CrosswordCreator():
         """
         Print crossword assignment to the terminal.
         """
+        for line in self.lines(assignment):
+            print(line)
+
+    def lines(self, assignment):
+        """
+        Return the rows of a crossword assignment as strings.
+        """
         letters = self.letter_grid(assignment)
+        lines = []
         for i in range(self.crossword.height):
+            line = ""
             for j in range(self.crossword.width):
                 if self.crossword.structure[i][j]:
-                    print(letters[i][j] or " ", end="")
+                    line += letters[i][j] or " "
                 else:
-                    print("█", end="")
-            print()
+                    line += "█"
+            lines.append(line)
+        return lines
 
     def save(self, assignment, filename):
         """
         Save crossword assignment to an image file.
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
+        from render import renderer
+        renderer().save(
+            self.crossword.structure, self.letter_grid(assignment), filename
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
-
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
-
-        img.save(filename)
+    def save_all(self, assignments, filenames):
+        """
+        Save many crossword assignments to image files, one per filename.
+        """
+        from render import renderer
+        renderer().save_all(
+            self.crossword.structure,
+            [self.letter_grid(assignment) for assignment in assignments],
+            filenames
+        )
 
     def solve(self):
         """
         Enforce node and arc consistency, and then solve the CSP.
         """
         self.enforce_node_consistency()
-        self.ac3()
+        if self.propagation != "none" and not self.ac3():
+            return None
+        if self.search == "backjump":
+            return self.backjump_with_restarts()
         return self.backtrack(dict())
 
     def enforce_node_consistency(self):
@@ -100,11 +168,9 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
         for variable in self.domains:
-            for word in self.domains[variable].copy():
 
-                # Check that length of word is equal to length of variable
-                if len(word) != variable.length:
-                    self.domains[variable].remove(word)
+            # Keep only words whose length is equal to length of variable
+            self.domains[variable] &= self.index.full(variable.length)
 
     def revise(self, x, y):
         """
@@ -115,16 +181,25 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        revised = False
-
-        for word in self.domains[x]:
-
-            # Check if word in domain X is the only word in domain Y (i.e. no corresponding value for y avaialble)
-            if word in self.domains[y] and len(self.domains[y]) == 1:
-                self.domains[x].remove(word)
-                revised = True
-        
-        return revised
+        overlap = self.crossword.overlaps[x, y]
+        if overlap is None:
+            return False
+        i, j = overlap
+
+        # Collect every word of x whose overlapping letter is matched by
+        # at least one word still in the domain of y
+        domain_y = self.domains[y]
+        x_masks = self.index.letters(x.length, i)
+        supported = 0
+        for letter, y_mask in self.index.letters(y.length, j).items():
+            if domain_y & y_mask:
+                supported |= x_masks.get(letter, 0)
+
+        domain_x = self.domains[x] & supported
+        if domain_x == self.domains[x]:
+            return False
+        self.domains[x] = domain_x
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -135,33 +210,38 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        if arcs == None:
-            arcs = set()
+        if arcs is None:
+            arcs = []
 
             # Loop over variables and get overlapping neighbours
             for x in self.domains:
                 for y in self.crossword.neighbors(x):
 
                     # Build initial list of all arcs
-                    arcs.add((x, y))
-        
-        while len(arcs) > 0:
+                    arcs.append((x, y))
+
+        # Process arcs first in, first out, never queueing an arc twice
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
 
             # Dequeue an arc
-            x, y = arcs.pop()
+            x, y = queue.popleft()
+            queued.discard((x, y))
 
             if self.revise(x, y):
 
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
-                
+
+                # Domain of x shrank, so recheck arcs pointing at x
                 for z in self.crossword.neighbors(x):
-                    if z != y:
-                        arcs.add(z, x)
-        
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+
         return True
 
-            
 
     def assignment_complete(self, assignment):
         """
@@ -183,6 +263,10 @@ class CrosswordCreator():
         for key in assignment:
             if key.length != len(assignment[key]):
                 return False
+
+        # If any word is used twice, then inconsistent
+        if len(set(assignment.values())) != len(assignment):
+            return False
         
         # Loop through overlapping cells
         for x, y in self.crossword.overlaps:
@@ -208,6 +292,24 @@ class CrosswordCreator():
         # If nothing inconsistent, then assignment is consistent
         return True
 
+    def consistent_with(self, var, value, assignment, used):
+        """
+        Return True if assigning `value` to `var` keeps the consistent
+        `assignment` consistent; return False otherwise.
+
+        Only the neighbors of `var` are checked for conflicting characters,
+        and `used` is the set of words already in `assignment`.
+        """
+        if var.length != len(value) or value in used:
+            return False
+
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != assignment[neighbor][j]:
+                    return False
+
+        return True
 
     def order_domain_values(self, var, assignment):
         """
@@ -216,19 +318,39 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
+        values = self.words(var)
+        if self.value_order == "random" or self.shuffle:
+            self.random.shuffle(values)
+        if self.value_order == "random":
+            return values
+
         odv = {}
 
+        # For each unassigned neighbor, how many of its words have each
+        # letter where it overlaps `var`
+        neighbors = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor not in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                domain = self.domains[neighbor]
+                neighbors.append((
+                    i,
+                    self.letter_counts(neighbor, j),
+                    domain.bit_count(),
+                    domain if neighbor.length == var.length else 0
+                ))
+
         # Loop through domain values to compare occurences in neighbouring domains
-        for value in self.domains[var]:
+        for value in values:
             odv[value] = 0
-            for neighbor in self.crossword.neighbors(var):
-                overlap = self.crossword.overlaps[var, neighbor]
-                for y in self.domains[neighbor]:
-                    if value[overlap[0]] != y[overlap[1]]:
-                        odv[value] += 1
+            word_id = self.index.id(value)
+            for i, counts, size, domain in neighbors:
+
+                # Count neighbouring words with a different overlapping letter
+                odv[value] += size - counts.get(value[i], 0)
 
-                # Check if test value exists in neighbouring domains and if neighbouring variable is already assigned
-                if value in self.domains[neighbor] and neighbor not in assignment:
+                # Check if test value exists in neighbouring domain
+                if domain >> word_id & 1:
 
                     # Count constraining values
                     odv[value] += 1
@@ -239,6 +361,28 @@ class CrosswordCreator():
 
         return odv_list
 
+    def letter_counts(self, var, position):
+        """
+        Return a dictionary mapping each letter to the number of words in
+        the domain of `var` with that letter at `position`.
+
+        Counts are cached along with the domain they describe and are only
+        recounted once that domain has changed, so a domain left alone
+        between calls costs nothing to rank against.
+        """
+        domain = self.domains[var]
+        cached = self.counts.get((var, position))
+        if cached is not None and cached[0] == domain:
+            return cached[1]
+
+        counts = dict()
+        for letter, mask in self.index.letters(var.length, position).items():
+            count = (domain & mask).bit_count()
+            if count:
+                counts[letter] = count
+        self.counts[var, position] = (domain, counts)
+        return counts
+
     def select_unassigned_variable(self, assignment):
         """
         Return an unassigned variable not already part of `assignment`.
@@ -252,10 +396,23 @@ class CrosswordCreator():
         # Build list of unassigned variables, length of domain and number of neighbours
         for var in self.domains:
             if var not in assignment:
-                mrv.append((var, len(self.domains[var]), len(self.crossword.neighbors(var))))
+                mrv.append((var, self.domains[var].bit_count(), len(self.crossword.neighbors(var))))
 
         if len(mrv) > 0:
-        
+
+            # Break remaining ties at random when seeded
+            if self.variable_order == "random" or self.shuffle:
+                self.random.shuffle(mrv)
+            if self.variable_order == "random":
+                return mrv[0][0]
+
+            if self.variable_order == "degree":
+
+                # Sort by minimum remaining value heuristic, then by degree
+                mrv.sort(key=lambda x: x[1])
+                mrv.sort(key=lambda x: x[2], reverse=True)
+                return mrv[0][0]
+
             # Sort by degree heuristic
             mrv.sort(key=lambda x: x[2], reverse=True)
 
@@ -266,15 +423,20 @@ class CrosswordCreator():
 
         return None
 
-    def backtrack(self, assignment):
+    def backtrack(self, assignment, used=None):
         """
         Using Backtracking Search, take as input a partial assignment for the
         crossword and return a complete assignment if possible to do so.
 
         `assignment` is a mapping from variables (keys) to words (values).
+        `used` is the set of words in `assignment`, kept up to date as
+        words are assigned and unassigned.
 
         If no assignment is possible, return None.
         """
+        if used is None:
+            used = set(assignment.values())
+
         # Return assignment if all values have been assigned to variables
         if self.assignment_complete(assignment):
             return assignment
@@ -283,30 +445,284 @@ class CrosswordCreator():
         var = self.select_unassigned_variable(assignment)
 
         for value in self.order_domain_values(var, assignment):
+            if not self.consistent_with(var, value, assignment, used):
+                continue
             assignment[var] = value
-            if self.consistent(assignment):
-                result = self.backtrack(assignment)
-                if result is not None:
-                    return result
+            used.add(value)
+            if self.propagation == "mac":
+                result = self.maintain_arc_consistency(var, assignment, used)
+            else:
+                result = self.backtrack(assignment, used)
+            if result is not None:
+                return result
             del assignment[var]
+            used.discard(value)
         return None
 
+    def maintain_arc_consistency(self, var, assignment, used):
+        """
+        Reduce the domain of `var` to its newly assigned word, propagate
+        that with AC-3 over arcs into `var`, and continue the search.
+        Domains are restored before returning if the search fails.
+        """
+        saved = self.domains.copy()
+        self.domains[var] = 1 << self.index.id(assignment[var])
+        arcs = [
+            (neighbor, var) for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        ]
+        result = None
+        if self.ac3(arcs):
+            result = self.backtrack(assignment, used)
+        if result is None:
+            self.domains = saved
+        return result
+
+    def backjump_with_restarts(self):
+        """
+        Search with `backjump`, restarting whenever a run uses up its node
+        limit. Limits follow the Luby sequence, and learned nogoods are
+        kept across restarts, so the search still terminates.
 
-def main():
+        Return a complete assignment, or None if there is none.
+        """
+        run = 1
+        while True:
+            self.nodes = 0
+            self.node_limit = self.restart_nodes * luby(run)
+            try:
+                result, _ = self.backjump(dict(), dict())
+                return result
+            except Restart:
+
+                # Break ties differently on the next run
+                self.shuffle = True
+                run += 1
+
+    def backjump(self, assignment, owners):
+        """
+        Using conflict-directed backjumping, extend the partial
+        `assignment` to a complete assignment if possible to do so.
+        `owners` maps each word in `assignment` to its variable.
+
+        Return a pair of the complete assignment, or None, and the set of
+        assigned variables responsible for the failure. When that set
+        does not include the variable chosen here, callers return straight
+        away, jumping back over it.
+        """
+        # Return a copy of the assignment if all values have been assigned,
+        # since callers unassign their variables on the way back up
+        if self.assignment_complete(assignment):
+            return dict(assignment), set()
+
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise Restart
+
+        # Choose an unassigned variable
+        var = self.select_unassigned_variable(assignment)
+
+        conflicts = set()
+        for value in self.order_domain_values(var, assignment):
+
+            # Skip values that conflict with earlier assignments
+            culprits = self.conflicts_with(var, value, assignment, owners)
+            if culprits:
+                conflicts |= culprits
+                continue
+
+            assignment[var] = value
+            owners[value] = var
+            result, conflict = self.backjump(assignment, owners)
+            del assignment[var]
+            del owners[value]
+
+            if result is not None:
+                return result, set()
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+            # Jump back over `var` if it played no part in the failure
+            if var not in conflict:
+                return None, conflict
+            conflicts |= conflict - {var}
+
+        # No word fits `var` given the conflicting assignments
+        self.learn(frozenset((v, assignment[v]) for v in conflicts))
+        return None, conflicts
+
+    def conflicts_with(self, var, value, assignment, owners):
+        """
+        Return the set of assigned variables that conflict with assigning
+        `value` to `var`, because of a mismatched letter, a repeated word
+        or a learned nogood. Return an empty set if there is no conflict.
+        """
+        culprits = set()
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != assignment[neighbor][j]:
+                    culprits.add(neighbor)
+        if value in owners:
+            culprits.add(owners[value])
+        if culprits:
+            return culprits
+
+        # Check nogoods that would be completed by this assignment
+        for nogood in self.watches.get((var, value), ()):
+            if all(
+                assignment.get(v) == word
+                for v, word in nogood if v != var
+            ):
+                self.nogoods.move_to_end(nogood)
+                return set(v for v, _ in nogood if v != var)
+        return culprits
+
+    def learn(self, nogood):
+        """
+        Remember `nogood`, a set of (variable, word) pairs that cannot all
+        be part of a solution, forgetting the least recently used nogood
+        if there are more than `nogood_limit`.
+        """
+        if not nogood or nogood in self.nogoods or not self.nogood_limit:
+            return
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self.watches.setdefault(pair, set()).add(nogood)
+
+        if len(self.nogoods) > self.nogood_limit:
+            forgotten, _ = self.nogoods.popitem(last=False)
+            for pair in forgotten:
+                self.watches[pair].discard(forgotten)
+                if not self.watches[pair]:
+                    del self.watches[pair]
+
+
+def luby(i):
+    """
+    Return the `i`th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if (1 << k) - 1 == i:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+def portfolio(size, seed=0, search="backtrack"):
+    """
+    Return `size` solver configurations for `solve_portfolio`, cycling
+    through combinations of heuristics, each with its own seed, and all
+    using the `search` strategy.
+    """
+    heuristics = [
+        ("mrv", "lcv"),
+        ("mrv", "random"),
+        ("degree", "lcv"),
+        ("random", "lcv"),
+        ("degree", "random")
+    ]
+    configurations = []
+    for i in range(size):
+        variable_order, value_order = heuristics[i % len(heuristics)]
+        configurations.append({
+            "variable_order": variable_order,
+            "value_order": value_order,
+            "seed": seed + i,
+            "search": search
+        })
+    return configurations
+
+
+# Crossword being solved by this portfolio worker process
+worker_crossword = None
+
+
+def portfolio_init(crossword):
+    """Keep the crossword in each worker, so it is only sent once."""
+    global worker_crossword
+    worker_crossword = crossword
+
+
+def portfolio_solve(configuration):
+    """Solve the worker's crossword with one solver configuration."""
+    creator = CrosswordCreator(worker_crossword, **configuration)
+    return configuration, creator.solve()
+
+
+def solve_portfolio(crossword, configurations=None, processes=None,
+                    timeout=None):
+    """
+    Solve `crossword` with several differently configured solvers running
+    in parallel processes, returning the first solution found and
+    stopping the rest.
+
+    `configurations` is a list of keyword arguments for `CrosswordCreator`,
+    by default one from `portfolio` per process. Return None if every
+    solver finds there is no solution, or if `timeout` seconds pass first.
+    """
+    processes = processes or os.cpu_count() or 1
+    if configurations is None:
+        configurations = portfolio(processes)
+
+    pool = multiprocessing.Pool(
+        min(processes, len(configurations)),
+        initializer=portfolio_init, initargs=(crossword,)
+    )
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        results = pool.imap_unordered(portfolio_solve, configurations)
+        for _ in configurations:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            _, assignment = results.next(timeout=remaining)
+            if assignment is not None:
+                return assignment
+        return None
+    except multiprocessing.TimeoutError:
+        return None
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(
+        usage="python generate.py structure words [output]"
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--portfolio", type=int, metavar="N",
+                        help="race N differently configured solvers")
+    parser.add_argument("--search", choices=CrosswordCreator.SEARCHES,
+                        default="backtrack", help="search strategy")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics at the end")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a trace of the search to FILE")
+    args = parser.parse_args()
+    output = args.output
+    if args.portfolio and (args.stats or args.trace):
+        parser.error("--stats and --trace cannot be used with --portfolio")
 
     # Generate crossword
-    crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    crossword = Crossword(args.structure, args.words)
+    creator = CrosswordCreator(crossword, search=args.search)
+    instrumentation = None
+    if args.stats or args.trace:
+        from instrument import Instrumentation
+        instrumentation = Instrumentation(trace=bool(args.trace))
+        instrumentation.attach(creator)
+    if args.portfolio:
+        assignment = solve_portfolio(
+            crossword, portfolio(args.portfolio, search=args.search),
+            processes=args.portfolio
+        )
+    else:
+        assignment = creator.solve()
 
     # Print result
     if assignment is None:
@@ -316,6 +732,12 @@ def main():
         if output:
             creator.save(assignment, output)
 
+    # Report on the search
+    if instrumentation and args.stats:
+        print(instrumentation.report())
+    if instrumentation and args.trace:
+        instrumentation.write_trace(args.trace)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,165 @@
+import json
+import time
+
+
+class Instrumentation():
+
+    # Methods of CrosswordCreator that can be instrumented
+    PHASES = ("backtrack", "backjump", "ac3", "revise", "order_domain_values")
+
+    def __init__(self, trace=False):
+        """
+        Collect statistics about a crossword search.
+
+        Instrumentation is attached to one `CrosswordCreator` by wrapping
+        its methods on the instance, so creators without it run the plain
+        methods with no overhead. If `trace` is True, every instrumented
+        call is also recorded as an event.
+        """
+        self.trace = trace
+        self.events = []
+        self.counts = {
+            "nodes": 0,
+            "backtracks": 0,
+            "ac3": 0,
+            "ac3_failures": 0,
+            "revisions": 0,
+            "revised": 0,
+            "prunes": 0,
+            "orderings": 0,
+            "values_ordered": 0
+        }
+
+        # Time spent in each phase, not counting time in nested phases
+        self.seconds = {phase: 0.0 for phase in Instrumentation.PHASES}
+
+        # Time spent in nested phases, for each call in progress
+        self.stack = []
+        self.start = None
+        self.creator = None
+
+    def attach(self, creator):
+        """
+        Instrument `creator`, returning this instrumentation.
+        """
+        self.creator = creator
+        self.start = time.perf_counter()
+        for phase in Instrumentation.PHASES:
+            method = getattr(creator, phase)
+            setattr(creator, phase, self.wrap(phase, method))
+        return self
+
+    def detach(self):
+        """
+        Remove instrumentation from the creator it was attached to.
+        """
+        for phase in Instrumentation.PHASES:
+            self.creator.__dict__.pop(phase, None)
+
+    def wrap(self, phase, method):
+        """
+        Return a version of `method` that records its calls as `phase`.
+        """
+        record = getattr(self, "record_" + phase)
+
+        def wrapper(*args, **kwargs):
+            before = self.before(phase, args)
+            self.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self.stack.pop()
+                self.seconds[phase] += elapsed - nested
+                if self.stack:
+                    self.stack[-1] += elapsed
+            record(args, before, result)
+            return result
+
+        return wrapper
+
+    def before(self, phase, args):
+        """
+        Return what needs remembering before a call, to record it after.
+        """
+        if phase == "revise":
+            return self.creator.domains[args[0]].bit_count()
+        return None
+
+    def event(self, phase, **details):
+        """Record an event in the trace, if tracing."""
+        if self.trace:
+            details["phase"] = phase
+            details["depth"] = len(self.stack)
+            details["time"] = time.perf_counter() - self.start
+            self.events.append(details)
+
+    def record_backtrack(self, args, before, result):
+        self.counts["nodes"] += 1
+        if result is None:
+            self.counts["backtracks"] += 1
+        self.event("backtrack", assigned=len(args[0]),
+                   solved=result is not None)
+
+    def record_backjump(self, args, before, result):
+        self.counts["nodes"] += 1
+        result, conflicts = result
+        if result is None:
+            self.counts["backtracks"] += 1
+        self.event("backjump", assigned=len(args[0]),
+                   solved=result is not None, conflicts=len(conflicts))
+
+    def record_ac3(self, args, before, result):
+        self.counts["ac3"] += 1
+        if not result:
+            self.counts["ac3_failures"] += 1
+        self.event("ac3", consistent=result)
+
+    def record_revise(self, args, before, result):
+        x, y = args
+        self.counts["revisions"] += 1
+        pruned = before - self.creator.domains[x].bit_count()
+        if result:
+            self.counts["revised"] += 1
+            self.counts["prunes"] += pruned
+        if self.trace and result:
+            self.event("revise", x=str(x), y=str(y), pruned=pruned)
+
+    def record_order_domain_values(self, args, before, result):
+        self.counts["orderings"] += 1
+        self.counts["values_ordered"] += len(result)
+        self.event("order_domain_values", var=str(args[0]),
+                   values=len(result))
+
+    def summary(self):
+        """
+        Return a dictionary of counts and seconds spent in each phase.
+        """
+        return {
+            "counts": dict(self.counts),
+            "seconds": dict(self.seconds),
+            "total_seconds": time.perf_counter() - self.start
+        }
+
+    def report(self):
+        """
+        Return a human-readable summary as a string.
+        """
+        summary = self.summary()
+        lines = ["Counts:"]
+        for name, count in summary["counts"].items():
+            lines.append(f"  {name}: {count}")
+        lines.append("Seconds:")
+        for phase, seconds in summary["seconds"].items():
+            lines.append(f"  {phase}: {seconds:.4f}")
+        lines.append(f"  total: {summary['total_seconds']:.4f}")
+        return "\n".join(lines)
+
+    def write_trace(self, filename):
+        """
+        Write the trace to `filename`, one JSON object per line.
+        """
+        with open(filename, "w") as f:
+            for event in self.events:
+                f.write(json.dumps(event) + "\n")
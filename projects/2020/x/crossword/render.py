@@ -0,0 +1,111 @@
+import functools
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+
+FONT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(path, size):
+    """Load a TrueType font once per path and size."""
+    return ImageFont.truetype(path, size)
+
+
+class Renderer():
+
+    def __init__(self, cell_size=100, cell_border=2, font=FONT,
+                 font_size=80):
+        """
+        Create a renderer for crossword images.
+
+        Each white cell is drawn once per letter as a tile, and each
+        structure is drawn once as a blank grid, so rendering an
+        assignment only copies the blank grid and pastes letter tiles.
+        """
+        self.cell_size = cell_size
+        self.cell_border = cell_border
+        self.font = load_font(font, font_size)
+
+        # Letter tiles by letter (None for an empty white cell), and blank
+        # grids by structure
+        self.tiles = dict()
+        self.grids = dict()
+
+    def tile(self, letter):
+        """Return the image of a white cell containing `letter`, if any."""
+        if letter not in self.tiles:
+            interior_size = self.cell_size - 2 * self.cell_border
+            tile = Image.new(
+                "RGBA", (interior_size + 1, interior_size + 1), "white"
+            )
+            if letter:
+                draw = ImageDraw.Draw(tile)
+                if hasattr(draw, "textbbox"):
+                    _, _, w, h = draw.textbbox((0, 0), letter, font=self.font)
+                else:
+                    w, h = draw.textsize(letter, font=self.font)
+                draw.text(
+                    ((interior_size - w) / 2,
+                     (interior_size - h) / 2 - 10),
+                    letter, fill="black", font=self.font
+                )
+            self.tiles[letter] = tile
+        return self.tiles[letter]
+
+    def grid(self, structure):
+        """Return the image of an empty grid with the given structure."""
+        key = tuple(tuple(row) for row in structure)
+        if key not in self.grids:
+            height = len(structure)
+            width = max((len(row) for row in structure), default=0)
+            img = Image.new(
+                "RGBA",
+                (width * self.cell_size, height * self.cell_size),
+                "black"
+            )
+            blank = self.tile(None)
+            for i, row in enumerate(structure):
+                for j, cell in enumerate(row):
+                    if cell:
+                        img.paste(blank, self.position(i, j))
+            self.grids[key] = img
+        return self.grids[key]
+
+    def position(self, i, j):
+        """Return the top left corner of the interior of cell (i, j)."""
+        return (j * self.cell_size + self.cell_border,
+                i * self.cell_size + self.cell_border)
+
+    def render(self, structure, letters):
+        """
+        Return an image of a crossword, given its structure and a 2D
+        array of letters (or None) in each cell.
+        """
+        img = self.grid(structure).copy()
+        for i, row in enumerate(structure):
+            for j, cell in enumerate(row):
+                if cell and letters[i][j]:
+                    img.paste(self.tile(letters[i][j]), self.position(i, j))
+        return img
+
+    def save(self, structure, letters, filename):
+        """Render a crossword and save it to an image file."""
+        self.render(structure, letters).save(filename)
+
+    def save_all(self, structure, grids, filenames):
+        """
+        Render and save many letter grids for the same structure, each to
+        the corresponding file in `filenames`.
+        """
+        for letters, filename in zip(grids, filenames):
+            self.save(structure, letters, filename)
+
+
+@functools.lru_cache(maxsize=None)
+def renderer(cell_size=100, cell_border=2):
+    """Return a shared renderer for the given cell size and border."""
+    return Renderer(cell_size, cell_border)
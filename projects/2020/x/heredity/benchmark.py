@@ -0,0 +1,204 @@
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import heredity
+from heredity import PROBS, Family, enumerate_probabilities
+
+# Each inference mode, as a function from people to probabilities
+MODES = {
+    "enumerate": lambda people: enumerate_probabilities(people),
+    "enumerate-log": lambda people: enumerate_probabilities(people, log=True),
+    "factor": lambda people: Family(people).marginals(),
+    "factor-log": lambda people: Family(people, log=True).marginals()
+}
+
+FIELDS = ["depth", "width", "observed", "seed", "people", "mode",
+          "seconds", "peak_bytes", "max_error", "reference"]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark heredity inference on synthetic pedigrees."
+    )
+    parser.add_argument("--depths", default="1,2,3,4,6",
+                        help="comma-separated numbers of generations")
+    parser.add_argument("--widths", default="2,3,4",
+                        help="comma-separated people per generation")
+    parser.add_argument("--observed", default="0,0.5,1",
+                        help="comma-separated fractions of observed traits")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="comma-separated inference modes to run")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for generating pedigrees")
+    parser.add_argument("--max-enumerate", type=int, default=6,
+                        help="largest family to run enumeration modes on")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            sys.exit(f"Unknown mode: {mode}")
+
+    results = benchmark(
+        depths=[int(d) for d in args.depths.split(",")],
+        widths=[int(w) for w in args.widths.split(",")],
+        observed=[float(o) for o in args.observed.split(",")],
+        modes=modes,
+        seed=args.seed,
+        max_enumerate=args.max_enumerate
+    )
+
+    # Print results
+    print(f"{'depth':>5} {'width':>5} {'obs':>4} {'people':>6} "
+          f"{'mode':<14} {'seconds':>9} {'peak KiB':>9} {'max error':>10}")
+    for row in results:
+        print(f"{row['depth']:>5} {row['width']:>5} {row['observed']:>4} "
+              f"{row['people']:>6} {row['mode']:<14} "
+              f"{row['seconds']:>9.4f} {row['peak_bytes'] / 1024:>9.1f} "
+              f"{row['max_error']:>10.2e}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def generate(depth, width, observed, seed):
+    """
+    Generate a synthetic pedigree, in the format returned by `load_data`.
+
+    The pedigree has `depth` generations of `width` people each. Everyone
+    after the first generation has two distinct parents chosen from the
+    generation before. Genes and traits are sampled from `PROBS`, and each
+    trait is kept as evidence with probability `observed`.
+    """
+    if depth > 1 and width < 2:
+        raise ValueError("width must be at least 2 to have parents")
+    rng = random.Random(seed)
+    table = heredity.tables()
+
+    people = dict()
+    genes = {None: None}
+    previous = []
+    for generation in range(depth):
+        current = []
+        for i in range(width):
+            name = f"G{generation}P{i}"
+            if previous:
+                mother, father = rng.sample(previous, 2)
+            else:
+                mother = father = None
+
+            # Sample genes given the parents, then the trait given genes
+            distribution = table["gene"][genes[mother], genes[father]]
+            gene = rng.choices(
+                list(distribution), weights=list(distribution.values())
+            )[0]
+            genes[name] = gene
+            trait = rng.random() < PROBS["trait"][gene][True]
+
+            people[name] = {
+                "name": name,
+                "mother": mother,
+                "father": father,
+                "trait": trait if rng.random() < observed else None
+            }
+            current.append(name)
+        previous = current
+    return people
+
+
+def measure(mode, people):
+    """
+    Run inference mode `mode` on `people`.
+    Return the probabilities, wall time in seconds, and peak memory in bytes.
+    Memory is traced in a second run, since tracing slows inference down.
+    """
+    start = time.perf_counter()
+    probabilities = MODES[mode](people)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    MODES[mode](people)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return probabilities, seconds, peak
+
+
+def max_error(probabilities, reference):
+    """
+    Return the largest absolute difference between two sets of probabilities.
+    """
+    return max(
+        abs(probabilities[person][field][value] -
+            reference[person][field][value])
+        for person in reference
+        for field in reference[person]
+        for value in reference[person][field]
+    )
+
+
+def benchmark(depths, widths, observed, modes, seed=0, max_enumerate=6):
+    """
+    Run every mode in `modes` over pedigrees of each depth, width and
+    observed fraction, returning one result row per run.
+
+    Errors are measured against exact enumeration where the family has at
+    most `max_enumerate` people, with enumeration itself measured against
+    its log-space version. On larger families, where enumeration modes are
+    skipped, each factor mode is measured against the other.
+    """
+    results = []
+    for depth in depths:
+        for width in widths:
+            for fraction in observed:
+                people = generate(depth, width, fraction, seed)
+                small = len(people) <= max_enumerate
+                references = dict()
+
+                for mode in modes:
+                    if mode.startswith("enumerate") and not small:
+                        continue
+                    if small and mode != "enumerate":
+                        reference_mode = "enumerate"
+                    elif small:
+                        reference_mode = "enumerate-log"
+                    elif mode == "factor":
+                        reference_mode = "factor-log"
+                    else:
+                        reference_mode = "factor"
+                    if reference_mode not in references:
+                        references[reference_mode] = MODES[reference_mode](
+                            people
+                        )
+                    reference = references[reference_mode]
+                    probabilities, seconds, peak = measure(mode, people)
+                    results.append({
+                        "depth": depth,
+                        "width": width,
+                        "observed": fraction,
+                        "seed": seed,
+                        "people": len(people),
+                        "mode": mode,
+                        "seconds": seconds,
+                        "peak_bytes": peak,
+                        "max_error": max_error(probabilities, reference),
+                        "reference": reference_mode
+                    })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import csv
+import heapq
 import itertools
+import math
 import sys
 
 PROBS = {
@@ -37,15 +39,42 @@ PROBS = {
 }
 
 
+# Inference modes selectable from the command line
+MODES = ("enumerate", "enumerate-log", "factor", "factor-log")
+
+
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3] or (
+        len(sys.argv) == 3 and sys.argv[2] not in MODES
+    ):
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(MODES)}]")
     people = load_data(sys.argv[1])
+    mode = sys.argv[2] if len(sys.argv) == 3 else "enumerate"
 
     # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    log = mode.endswith("-log")
+    if mode.startswith("enumerate"):
+        probabilities = enumerate_probabilities(people, log=log)
+    else:
+        probabilities = Family(people, log=log).marginals()
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return a gene and trait distribution of all zeros for each person.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,6 +89,23 @@ def main():
         for person in people
     }
 
+
+def enumerate_probabilities(people, log=False):
+    """
+    Compute gene and trait distributions for everyone in `people` by
+    summing the joint probability of every possible assignment.
+
+    If `log` is True, joint probabilities are computed and accumulated in
+    log space, so large families do not underflow to 0.
+    """
+    probabilities = empty_probabilities(people)
+    table = tables()
+    if log:
+        for person in probabilities:
+            for field in probabilities[person]:
+                for value in probabilities[person][field]:
+                    probabilities[person][field][value] = -math.inf
+
     # Loop over all sets of people who might have the trait
     names = set(people)
     for have_trait in powerset(names):
@@ -78,20 +124,24 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+                if log:
+                    p = log_joint_probability(
+                        people, one_gene, two_genes, have_trait, table
+                    )
+                    log_update(probabilities, one_gene, two_genes,
+                               have_trait, p)
+                else:
+                    p = joint_probability(
+                        people, one_gene, two_genes, have_trait, table
+                    )
+                    update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
-    normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    if log:
+        log_normalize(probabilities)
+    else:
+        normalize(probabilities)
+    return probabilities
 
 
 def load_data(filename):
@@ -128,7 +178,108 @@ def powerset(s):
     ]
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def probs_key():
+    """
+    Return a hashable snapshot of `PROBS`.
+    Used to tell when the cached probability tables have gone stale.
+    """
+    return (
+        tuple(sorted(PROBS["gene"].items())),
+        tuple(
+            (gene, PROBS["trait"][gene][True], PROBS["trait"][gene][False])
+            for gene in sorted(PROBS["trait"])
+        ),
+        PROBS["mutation"]
+    )
+
+
+# Cached tables derived from PROBS, rebuilt whenever PROBS changes
+TABLES = {"key": None}
+
+
+def tables():
+    """
+    Return the probability tables for the current values of `PROBS`.
+
+    The result is a dictionary with four tables, and under "key" the
+    snapshot of `PROBS` they were computed from:
+        * "gene" maps (mother genes, father genes) to a distribution over
+          the child's number of genes. Unknown parents are keyed as
+          (None, None) and map to the unconditional gene distribution.
+        * "trait" maps (genes, trait) to the probability of the trait
+          given that number of genes.
+        * "log_gene" and "log_trait" hold the logarithms of the above.
+    Tables are computed once and reused until `PROBS` is modified.
+    """
+    key = probs_key()
+    if TABLES["key"] == key:
+        return TABLES
+
+    # Probability that a parent with a given number of genes passes one on
+    mutation = PROBS["mutation"]
+    passes = {
+        2: 1 - mutation,
+        1: 0.5,
+        0: mutation
+    }
+
+    gene = {(None, None): dict(PROBS["gene"])}
+    for mother in passes:
+        for father in passes:
+            m, f = passes[mother], passes[father]
+            gene[mother, father] = {
+                2: m * f,
+                1: m * (1 - f) + (1 - m) * f,
+                0: (1 - m) * (1 - f)
+            }
+
+    trait = {
+        (genes, value): PROBS["trait"][genes][value]
+        for genes in PROBS["trait"]
+        for value in (True, False)
+    }
+
+    log_gene = {
+        parents: {child: safe_log(p) for child, p in distribution.items()}
+        for parents, distribution in gene.items()
+    }
+    log_trait = {index: safe_log(p) for index, p in trait.items()}
+
+    TABLES.update(key=key, gene=gene, trait=trait,
+                  log_gene=log_gene, log_trait=log_trait)
+    return TABLES
+
+
+def safe_log(p):
+    """
+    Return the natural logarithm of `p`, or negative infinity if `p` is 0.
+    """
+    return math.log(p) if p > 0 else -math.inf
+
+
+def logaddexp(a, b):
+    """
+    Return log(exp(a) + exp(b)) without leaving log space.
+    """
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def logsumexp(values):
+    """
+    Return the logarithm of the sum of the exponentials of `values`.
+    """
+    values = list(values)
+    top = max(values)
+    if top == -math.inf:
+        return top
+    return top + math.log(sum(math.exp(v - top) for v in values))
+
+
+def joint_probability(people, one_gene, two_genes, have_trait, table=None):
     """
     Compute and return a joint probability.
 
@@ -138,84 +289,65 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    `table` holds the probability tables from `tables()`, which are looked
+    up if not given; callers computing many joint probabilities pass them
+    in to avoid checking `PROBS` each time.
     """
+    if table is None:
+        table = tables()
+    gene_table = table["gene"]
+    trait_table = table["trait"]
+
+    # Assign number of genes to everyone up front for indexing
+    genes = {
+        name: 2 if name in two_genes else 1 if name in one_gene else 0
+        for name in people
+    }
+    genes[None] = None
+
     joint = 1
+    for name in people:
+        person = people[name]
+        gene = genes[name]
 
-    # Build out all the possible cases
+        # Unknown parents are looked up as (None, None)
+        parents = (genes[person["mother"]], genes[person["father"]])
 
-    for name in people:
-        
-        # Assign values to trait and gene for indexing
-        trait = True if name in have_trait else False
-        gene = 2 if name in two_genes else 1 if name in one_gene else 0
-        
-        # Case where no parent is known - use defined probability table
-        if people[name]["mother"] is None:
-            prob = PROBS["gene"][gene]
-        
-        # Case where parents are known
-        else:
+        # Calculate joint probability (gene prob * trait prob)
+        joint *= (gene_table[parents][gene] *
+                  trait_table[gene, name in have_trait])
 
-            mother = 2 if people[name]["mother"] in two_genes else 1 if people[name]["mother"] in one_gene else 0
-            father = 2 if people[name]["father"] in two_genes else 1 if people[name]["father"] in one_gene else 0
+    return joint
 
-            low = PROBS["mutation"]
-            mid = 0.5
-            high = 1 - PROBS["mutation"]
 
-            if gene == 2:
-                if people[name]["mother"] in two_genes:
-                    prob_mother = 1 - PROBS["mutation"]
-                elif people[name]["mother"] in one_gene:
-                    prob_mother = 0.5
-                else:
-                    prob_mother = PROBS["mutation"]
-                if people[name]["father"] in two_genes:
-                    prob_father = 1 - PROBS["mutation"]
-                elif people[name]["father"] in one_gene:
-                    prob_father = 0.5
-                else:
-                    prob_father = PROBS["mutation"]
-
-                prob = prob_mother * prob_father
-            
-            elif gene == 0:
-                if people[name]["mother"] in two_genes:
-                    prob_mother = PROBS["mutation"]
-                elif people[name]["mother"] in one_gene:
-                    prob_mother = 0.5
-                else:
-                    prob_mother = 1 - PROBS["mutation"]
-                if people[name]["father"] in two_genes:
-                    prob_father = PROBS["mutation"]
-                elif people[name]["father"] in one_gene:
-                    prob_father = 0.5
-                else:
-                    prob_father = 1 - PROBS["mutation"]
-
-                prob = prob_mother * prob_father
-            
-            # Case where gene is 1
-            else:
-                
-                if (mother == 0 and father == 0) or (mother == 2 and father == 2):
-                    prob = low * high + high * low
-                        
-                if (mother == 2 and father == 0) or (mother == 0 and father == 2):
-                    prob = high * high + low * low
-
-                if ((mother == 0 and father == 1) or (mother == 1 and father == 2) or
-                    (mother == 1 and father == 0) or (mother == 2 and father == 1)):
-                    prob = high * mid + low * mid
-                        
-                if (mother == 1 and father == 1):
-                    prob = mid * mid + mid * mid
-        
-        # Calculate joint probability (gene prob * trait prob)
-        joint *= prob * PROBS["trait"][gene][trait]
+def log_joint_probability(people, one_gene, two_genes, have_trait,
+                          table=None):
+    """
+    Compute and return the logarithm of `joint_probability`, by adding
+    entries of the log probability tables instead of multiplying.
+    """
+    if table is None:
+        table = tables()
+    gene_table = table["log_gene"]
+    trait_table = table["log_trait"]
+
+    genes = {
+        name: 2 if name in two_genes else 1 if name in one_gene else 0
+        for name in people
+    }
+    genes[None] = None
+
+    joint = 0
+    for name in people:
+        person = people[name]
+        gene = genes[name]
+        parents = (genes[person["mother"]], genes[person["father"]])
+        joint += (gene_table[parents][gene] +
+                  trait_table[gene, name in have_trait])
 
     return joint
-            
+
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
@@ -252,5 +384,453 @@ def normalize(probabilities):
             probabilities[person]["trait"][key] /= sum_trait
 
 
+def log_update(probabilities, one_gene, two_genes, have_trait, log_p):
+    """
+    Add to `probabilities` a new joint probability, given as its
+    logarithm `log_p`. Entries of `probabilities` are kept in log space.
+    """
+    for person in probabilities:
+
+        trait = True if person in have_trait else False
+        gene = 2 if person in two_genes else 1 if person in one_gene else 0
+
+        distribution = probabilities[person]
+        distribution["gene"][gene] = logaddexp(
+            distribution["gene"][gene], log_p
+        )
+        distribution["trait"][trait] = logaddexp(
+            distribution["trait"][trait], log_p
+        )
+
+
+def log_normalize(probabilities):
+    """
+    Update `probabilities`, whose entries are in log space, such that each
+    distribution is normalized and converted back to probabilities.
+    """
+    for person in probabilities:
+        for field in probabilities[person]:
+            distribution = probabilities[person][field]
+            total = logsumexp(distribution.values())
+            for key in distribution:
+                distribution[key] = math.exp(distribution[key] - total)
+
+
+# Possible number of genes for each person
+GENES = (2, 1, 0)
+
+
+class Family():
+    """
+    Compiled inference state for a family.
+
+    The family is compiled once into a junction tree over each person's
+    number of genes, with one clique per person. Messages between cliques
+    are computed lazily and cached, so when a single trait observation is
+    set or cleared only the messages that depended on it are recomputed.
+
+    With `log` set, potentials and messages are kept in log space, which
+    stays stable for pedigrees of hundreds of people.
+    """
+
+    def __init__(self, people, log=False):
+        """
+        Compile a family from `people`, as returned by `load_data`.
+        """
+        self.log = log
+        self.people = {name: dict(people[name]) for name in people}
+
+        # Moralized graph: connect each child with both parents, and
+        # the parents with each other
+        graph = {name: set() for name in people}
+        for name, person in people.items():
+            if person["mother"] is not None:
+                members = {name, person["mother"], person["father"]}
+                for member in members:
+                    graph[member] |= members - {member}
+
+        # Eliminate people one at a time, choosing whoever adds the fewest
+        # fill-in edges; each person's clique is them and their neighbors
+        # at the time they are eliminated
+        self.cliques = dict()
+        self.tree = {name: set() for name in people}
+        self.separators = dict()
+        position = dict()
+
+        # Heap of elimination scores, with outdated entries skipped
+        scores = {name: self.score(graph, name) for name in graph}
+        heap = [(score, name) for name, score in scores.items()]
+        heapq.heapify(heap)
+        while graph:
+            score, name = heapq.heappop(heap)
+            if name not in graph or scores[name] != score:
+                continue
+            neighbors = graph.pop(name)
+            affected = set(neighbors)
+            for neighbor in neighbors:
+                added = neighbors - graph[neighbor] - {neighbor}
+                graph[neighbor] |= added
+                graph[neighbor].discard(name)
+
+                # A new edge changes the score of everyone adjacent to
+                # both of its ends
+                for other in added:
+                    affected |= graph[neighbor] & graph[other]
+            for other in affected:
+                scores[other] = self.score(graph, other)
+                heapq.heappush(heap, (scores[other], other))
+            position[name] = len(position)
+            self.cliques[name] = (name,) + tuple(sorted(neighbors))
+
+        # Link each clique to the clique of the first of its neighbors
+        # to be eliminated, which contains all the neighbors
+        for name, clique in self.cliques.items():
+            if len(clique) == 1:
+                continue
+            parent = min(clique[1:], key=lambda n: position[n])
+            self.tree[name].add(parent)
+            self.tree[parent].add(name)
+            separator = clique[1:]
+            self.separators[name, parent] = separator
+            self.separators[parent, name] = separator
+
+        # Position of each separator's people within each clique
+        self.indices = {
+            (a, b): tuple(self.cliques[a].index(n) for n in separator)
+            for (a, b), separator in self.separators.items()
+        }
+
+        # Assign each person's inheritance factor to the clique of the
+        # first family member to be eliminated
+        self.factors = {name: [] for name in people}
+        for name, person in people.items():
+            members = [name]
+            if person["mother"] is not None:
+                members += [person["mother"], person["father"]]
+            home = min(members, key=lambda n: position[n])
+            self.factors[home].append(name)
+
+        self.key = None
+        self.base = dict()
+        self.potentials = dict()
+        self.messages = dict()
+
+    @staticmethod
+    def score(graph, name):
+        """
+        Return the elimination order key of `name` in `graph`: fewest
+        fill-in edges first, then fewest neighbors, then by name.
+        """
+        return (Family.fill_in(graph, name), len(graph[name]), name)
+
+    @staticmethod
+    def fill_in(graph, name):
+        """
+        Return the number of edges eliminating `name` from `graph` would add.
+        """
+        neighbors = list(graph[name])
+        return sum(
+            1
+            for i, a in enumerate(neighbors)
+            for b in neighbors[i + 1:]
+            if b not in graph[a]
+        )
+
+    def observe(self, name, trait):
+        """
+        Set `name`'s trait to True or False, or clear it with None.
+        Only messages that depended on the old observation are discarded.
+        """
+        if self.people[name]["trait"] == trait:
+            return
+        self.people[name]["trait"] = trait
+        self.potentials.pop(name, None)
+        self.invalidate(name)
+
+    def invalidate(self, name):
+        """
+        Discard every cached message directed away from `name`'s clique.
+        """
+        frontier = [name]
+        visited = {name}
+        while frontier:
+            source = frontier.pop()
+            for target in self.tree[source]:
+                if target not in visited:
+                    self.messages.pop((source, target), None)
+                    visited.add(target)
+                    frontier.append(target)
+
+    def refresh(self):
+        """
+        Rebuild clique potentials if `PROBS` changed since they were built.
+        """
+        table = tables()
+        if self.key == table["key"]:
+            return
+        gene_table = table["log_gene" if self.log else "gene"]
+        self.base = dict()
+        for name, clique in self.cliques.items():
+            base = dict()
+            for genes in itertools.product(GENES, repeat=len(clique)):
+                assignment = dict(zip(clique, genes))
+                assignment[None] = None
+                p = 0 if self.log else 1
+                for child in self.factors[name]:
+                    person = self.people[child]
+                    parents = (assignment[person["mother"]],
+                               assignment[person["father"]])
+                    if self.log:
+                        p += gene_table[parents][assignment[child]]
+                    else:
+                        p *= gene_table[parents][assignment[child]]
+                base[genes] = p
+            self.base[name] = base
+        self.key = table["key"]
+        self.potentials = dict()
+        self.messages = dict()
+
+    def potential(self, name):
+        """
+        Return the potential of `name`'s clique, including evidence.
+        """
+        if name not in self.potentials:
+            potential = self.base[name]
+            trait = self.people[name]["trait"]
+            if trait is not None and self.log:
+                trait_table = tables()["log_trait"]
+                potential = {
+                    genes: p + trait_table[genes[0], trait]
+                    for genes, p in potential.items()
+                }
+            elif trait is not None:
+                trait_table = tables()["trait"]
+                potential = {
+                    genes: p * trait_table[genes[0], trait]
+                    for genes, p in potential.items()
+                }
+            self.potentials[name] = potential
+        return self.potentials[name]
+
+    def message(self, source, target):
+        """
+        Compute the message from clique `source` to clique `target`,
+        assuming all messages into `source` are already cached.
+        """
+        incoming = [
+            (self.messages[other, source], self.indices[source, other])
+            for other in self.tree[source] if other != target
+        ]
+        indices = self.indices[source, target]
+        if self.log:
+            terms = dict()
+            for genes, p in self.potential(source).items():
+                for m, index in incoming:
+                    p += m[tuple(genes[i] for i in index)]
+                key = tuple(genes[i] for i in indices)
+                terms.setdefault(key, []).append(p)
+            return {key: logsumexp(values) for key, values in terms.items()}
+
+        message = dict()
+        for genes, p in self.potential(source).items():
+            for m, index in incoming:
+                p *= m[tuple(genes[i] for i in index)]
+            key = tuple(genes[i] for i in indices)
+            message[key] = message.get(key, 0) + p
+        return message
+
+    def collect(self, name):
+        """
+        Ensure every message directed towards `name`'s clique is cached.
+        """
+        # Order the edges so that each message is computed after the
+        # messages it depends on. A cached message's own dependencies are
+        # still cached, since invalidation discards them together, so the
+        # walk stops at cached messages
+        edges = []
+        frontier = [(name, None)]
+        while frontier:
+            target, parent = frontier.pop()
+            for source in self.tree[target]:
+                if source != parent and (source, target) not in self.messages:
+                    edges.append((source, target))
+                    frontier.append((source, target))
+
+        for source, target in reversed(edges):
+            self.messages[source, target] = self.message(source, target)
+
+    def marginal(self, name):
+        """
+        Return the gene and trait distributions for `name`, given all
+        trait observations in the family.
+        """
+        self.refresh()
+        self.collect(name)
+        return self.belief(name)
+
+    def belief(self, name):
+        """
+        Return the distributions `marginal` returns for `name`, assuming
+        every message into `name`'s clique is already cached.
+        """
+        # Combine the clique potential with every incoming message,
+        # then sum out everyone else in the clique
+        belief = {gene: [] for gene in GENES}
+        for genes, p in self.potential(name).items():
+            for other in self.tree[name]:
+                index = self.indices[name, other]
+                m = self.messages[other, name][tuple(genes[i] for i in index)]
+                if self.log:
+                    p += m
+                else:
+                    p *= m
+            belief[genes[0]].append(p)
+
+        if self.log:
+            belief = {g: logsumexp(belief[g]) for g in GENES}
+            total = logsumexp(belief.values())
+            gene = {g: math.exp(belief[g] - total) for g in GENES}
+        else:
+            belief = {g: sum(belief[g]) for g in GENES}
+            total = sum(belief.values())
+            gene = {g: belief[g] / total for g in GENES}
+
+        trait = self.people[name]["trait"]
+        if trait is None:
+            trait_table = tables()["trait"]
+            p = sum(gene[g] * trait_table[g, True] for g in GENES)
+        else:
+            p = 1 if trait else 0
+        return {
+            "gene": gene,
+            "trait": {
+                True: p,
+                False: 1 - p
+            }
+        }
+
+    def marginals(self):
+        """
+        Return gene and trait distributions for everyone in the family,
+        in the same format `enumerate_probabilities` uses.
+        """
+        self.refresh()
+
+        # Collecting towards each root computes every message towards it,
+        # then each clique visited outwards from the root only needs the
+        # one message from its parent
+        order, _ = self.traversal()
+        for name in order:
+            self.collect(name)
+        return {name: self.belief(name) for name in self.people}
+
+    def traversal(self):
+        """
+        Return every clique in an order where each comes after its parent,
+        starting from the root clique of each tree, and a dictionary of
+        each clique's children.
+        """
+        roots = [name for name, clique in self.cliques.items()
+                 if len(clique) == 1]
+        order = []
+        children = dict()
+        for root in roots:
+            frontier = [(root, None)]
+            while frontier:
+                name, parent = frontier.pop()
+                order.append(name)
+                children[name] = [n for n in self.tree[name] if n != parent]
+                frontier.extend((child, name) for child in children[name])
+        return order, children
+
+    def most_probable(self, k=1):
+        """
+        Return the `k` most probable joint gene and trait assignments for
+        the family, given all trait observations.
+
+        Each result is a (log probability, assignment) pair, most probable
+        first, where the log probability is of the whole assignment and
+        the assignment maps each person to a dictionary with "gene" and
+        "trait" keys. Uses max-product message passing over the same
+        junction tree as `marginal`, keeping the best `k` partial
+        assignments per separator value.
+        """
+        self.refresh()
+        table = tables()
+        trait_table = table["log_trait"]
+
+        # Pass messages from the leaves towards each root clique, so that
+        # each clique is processed after all of its children
+        order, children = self.traversal()
+        roots = [name for name in order if len(self.cliques[name]) == 1]
+
+        best = dict()
+        for name in reversed(order):
+            person = self.people[name]
+            traits = ((True, False) if person["trait"] is None
+                      else (person["trait"],))
+            parent = next(iter(self.tree[name] - set(children[name])), None)
+            indices = self.indices[name, parent] if parent is not None else ()
+
+            candidates = dict()
+            for genes, p in self.log_base(name).items():
+                if p == -math.inf:
+                    continue
+
+                # Best combinations of each child's partial assignments;
+                # separator values a child cannot take have no entries
+                partial = [(p, ())]
+                for child in children[name]:
+                    key = tuple(genes[i] for i in self.indices[name, child])
+                    partial = heapq.nlargest(k, (
+                        (score + entry[0], choices + ((child, key, rank),))
+                        for score, choices in partial
+                        for rank, entry in enumerate(best[child].get(key, ()))
+                    ), key=lambda c: c[0])
+
+                key = tuple(genes[i] for i in indices)
+                for trait in traits:
+                    t = trait_table[genes[0], trait]
+                    candidates.setdefault(key, []).extend(
+                        (score + t, genes[0], trait, choices)
+                        for score, choices in partial
+                    )
+
+            best[name] = {
+                key: heapq.nlargest(k, entries, key=lambda e: e[0])
+                for key, entries in candidates.items()
+            }
+
+        # Combine the best assignments of each disconnected component
+        results = [(0, ())]
+        for root in roots:
+            results = heapq.nlargest(k, (
+                (score + entry[0], choices + ((root, (), rank),))
+                for score, choices in results
+                for rank, entry in enumerate(best[root].get((), []))
+            ), key=lambda r: r[0])
+
+        # Follow the choices back down the tree to recover each assignment
+        explanations = []
+        for score, choices in results:
+            assignment = dict()
+            frontier = list(choices)
+            while frontier:
+                name, key, rank = frontier.pop()
+                _, gene, trait, subchoices = best[name][key][rank]
+                assignment[name] = {"gene": gene, "trait": trait}
+                frontier.extend(subchoices)
+            explanations.append((score, assignment))
+        return explanations
+
+    def log_base(self, name):
+        """
+        Return the log of `name`'s clique potential, without evidence.
+        """
+        if self.log:
+            return self.base[name]
+        return {genes: safe_log(p) for genes, p in self.base[name].items()}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,277 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from logic import *
+
+# Each entailment backend, as a function from a knowledge base and queries
+# to the list of queries entailed
+BACKENDS = {
+    "enumerate": lambda knowledge, queries: check_all(
+        knowledge, queries, "enumerate", preprocess=False
+    ),
+    "enumerate-simplified": lambda knowledge, queries: check_all(
+        knowledge, queries, "enumerate"
+    ),
+    "parallel": lambda knowledge, queries: check_all(
+        knowledge, queries, "parallel"
+    ),
+    "sat": lambda knowledge, queries: check_all(
+        knowledge, queries, "sat", preprocess=False
+    ),
+    "sat-simplified": lambda knowledge, queries: check_all(
+        knowledge, queries, "sat"
+    ),
+    "count": lambda knowledge, queries: [
+        model_count(And(knowledge, Not(query))) == 0 for query in queries
+    ]
+}
+
+# Backends that check every model, so only run on small problems
+ENUMERATING = ("enumerate", "enumerate-simplified", "parallel")
+
+# Slowdown, relative to a baseline run, reported as a regression
+REGRESSION = 1.25
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark entailment backends on random k-SAT "
+                    "instances and knights and knaves puzzles."
+    )
+    parser.add_argument("--ksat-symbols", default="8,12,16,40",
+                        help="comma-separated numbers of k-SAT symbols")
+    parser.add_argument("--k", type=int, default=3,
+                        help="literals in each k-SAT clause")
+    parser.add_argument("--ratio", type=float, default=4.0,
+                        help="k-SAT clauses per symbol")
+    parser.add_argument("--people", default="3,5,8,20",
+                        help="comma-separated numbers of puzzle inhabitants")
+    parser.add_argument("--trials", type=int, default=2,
+                        help="instances to generate for each size")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="comma-separated backends to run")
+    parser.add_argument("--max-enumerate", type=int, default=16,
+                        help="most symbols to run enumerating backends on")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for generating instances")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare with results from an earlier run")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    for backend in backends:
+        if backend not in BACKENDS:
+            sys.exit(f"Unknown backend: {backend}")
+
+    results = benchmark(
+        ksat_symbols=[int(n) for n in args.ksat_symbols.split(",")],
+        people=[int(n) for n in args.people.split(",")],
+        backends=backends,
+        k=args.k,
+        ratio=args.ratio,
+        trials=args.trials,
+        max_enumerate=args.max_enumerate,
+        seed=args.seed
+    )
+
+    # Print results
+    print(f"{'family':<8} {'size':>5} {'trial':>5} {'symbols':>7} "
+          f"{'backend':<22} {'seconds':>9} {'peak KiB':>9} {'entailed':>8} "
+          f"{'agrees':>6}")
+    for row in results:
+        print(f"{row['family']:<8} {row['size']:>5} {row['trial']:>5} "
+              f"{row['symbols']:>7} {row['backend']:<22} "
+              f"{row['seconds']:>9.4f} {row['peak_bytes'] / 1024:>9.1f} "
+              f"{row['entailed']:>8} {str(row['agrees']):>6}")
+
+    disagreements = [row for row in results if not row["agrees"]]
+    if disagreements:
+        print(f"{len(disagreements)} runs disagree with their reference.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print("No regressions.")
+
+    if disagreements:
+        sys.exit(1)
+
+
+def random_ksat(n, k, ratio, rng):
+    """
+    Generate a random k-SAT knowledge base over `n` symbols, with about
+    `ratio` clauses per symbol, each of `k` distinct symbols negated at
+    random. Return the knowledge base and a query for each symbol.
+    """
+    symbols = [Symbol(f"x{i}") for i in range(n)]
+    clauses = []
+    for _ in range(round(ratio * n)):
+        clauses.append(Or(*[
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, min(k, n))
+        ]))
+    return And(*clauses), symbols
+
+
+def knights(n, rng):
+    """
+    Generate a knights and knaves puzzle with `n` inhabitants, each of
+    whom makes one statement about the others. Knights always tell the
+    truth and knaves always lie; statements are chosen to be consistent
+    with a hidden assignment of kinds, so the puzzle has a solution.
+    Return the knowledge base and a query for each symbol.
+    """
+    names = [f"P{i}" for i in range(n)]
+    knight = {name: Symbol(f"{name} is a Knight") for name in names}
+    knave = {name: Symbol(f"{name} is a Knave") for name in names}
+    hidden = {name: rng.random() < 0.5 for name in names}
+    world = {**{knight[name].name: hidden[name] for name in names},
+             **{knave[name].name: not hidden[name] for name in names}}
+
+    knowledge = []
+    for name in names:
+        knowledge.append(And(Or(knight[name], knave[name]),
+                             Not(And(knight[name], knave[name]))))
+
+    for speaker in names:
+        others = [name for name in names if name != speaker] or [speaker]
+        x, y = rng.choice(others), rng.choice(others)
+        statement = rng.choice([
+            knight[x],
+            knave[x],
+            Or(knave[x], knave[y]),
+            And(knight[x], knight[y]),
+            Biconditional(knight[x], knight[y]),
+            Implication(knight[x], knave[y])
+        ])
+
+        # A knight's statement is true and a knave's false, so negate any
+        # statement that would contradict the hidden assignment
+        if statement.evaluate(world) != hidden[speaker]:
+            statement = Not(statement)
+        knowledge.append(Biconditional(knight[speaker], statement))
+
+    queries = ([knight[name] for name in names]
+               + [knave[name] for name in names])
+    return And(*knowledge), queries
+
+
+def measure(backend, knowledge, queries):
+    """
+    Run entailment backend `backend` on a knowledge base and queries.
+    Return the answers, wall time in seconds, and peak memory in bytes.
+    Memory used by worker processes is not counted.
+    """
+    start = time.perf_counter()
+    entailed = BACKENDS[backend](knowledge, queries)
+    seconds = time.perf_counter() - start
+
+    # Trace memory in a run of its own, so the overhead of tracing every
+    # allocation is not counted in the time
+    tracemalloc.start()
+    BACKENDS[backend](knowledge, queries)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return entailed, seconds, peak
+
+
+def benchmark(ksat_symbols, people, backends, k=3, ratio=4.0, trials=1,
+              max_enumerate=16, seed=0):
+    """
+    Run every backend in `backends` on random k-SAT instances with each
+    number of symbols, and knights and knaves puzzles with each number of
+    people, returning one result row per run.
+
+    Answers are checked against plain enumeration, without simplification,
+    on instances with at most `max_enumerate` symbols, and against the SAT
+    backend on larger ones, where enumerating backends are skipped.
+    """
+    # Seed each instance separately, so the same instance is generated
+    # whichever other sizes are run
+    instances = []
+    for n in ksat_symbols:
+        for trial in range(trials):
+            rng = random.Random(f"{seed} ksat {n} {trial}")
+            knowledge, queries = random_ksat(n, k, ratio, rng)
+            instances.append(("ksat", n, trial, knowledge, queries))
+    for n in people:
+        for trial in range(trials):
+            rng = random.Random(f"{seed} knights {n} {trial}")
+            knowledge, queries = knights(n, rng)
+            instances.append(("knights", n, trial, knowledge, queries))
+
+    results = []
+    for family, size, trial, knowledge, queries in instances:
+        symbols = len(knowledge.symbols())
+        small = symbols <= max_enumerate
+        reference_backend = "enumerate" if small else "sat"
+        reference = BACKENDS[reference_backend](knowledge, queries)
+        for backend in backends:
+            if backend in ENUMERATING and not small:
+                continue
+            entailed, seconds, peak = measure(backend, knowledge, queries)
+            results.append({
+                "family": family,
+                "size": size,
+                "trial": trial,
+                "symbols": symbols,
+                "backend": backend,
+                "seconds": seconds,
+                "peak_bytes": peak,
+                "entailed": sum(entailed),
+                "answers": entailed,
+                "agrees": entailed == reference,
+                "reference": reference_backend
+            })
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compare `results` with `baseline` results run with the same options.
+    Return a description of each run that became more than `REGRESSION`
+    times slower, or whose answers changed.
+    """
+    def key(result):
+        return (result["family"], result["size"], result["trial"],
+                result["backend"])
+
+    previous = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = "{} size {} trial {} ({})".format(*key(result))
+        if result["answers"] != old["answers"]:
+            changed = sum(a != b for a, b in zip(result["answers"],
+                                                 old["answers"]))
+            regressions.append(
+                f"{name}: {changed} answers changed, "
+                f"{old['entailed']} -> {result['entailed']} entailed"
+            )
+        elif result["seconds"] > REGRESSION * max(old["seconds"], 0.01):
+            regressions.append(
+                f"{name}: {old['seconds']:.3f}s -> {result['seconds']:.3f}s"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
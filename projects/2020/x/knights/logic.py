@@ -1,7 +1,90 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+
+import sat
+
+# Largest number of symbols for which model_check counts through models
+ENUMERATION_LIMIT = 16
 
 
 class Sentence():
+    """
+    Sentences that cannot change are interned: constructing one equal to
+    a sentence that already exists returns the existing sentence, so
+    equal subformulas are stored once, and each caches its hash and, once
+    asked, its set of symbols.
+
+    And can be added to, so conjunctions, and any sentence containing one,
+    are never interned, and work out their hash and symbols when asked.
+    """
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Whether sentences of this class can change after they are built
+    mutable = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Sentences of this class in use, by their arguments
+        cls.interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *arguments):
+        if cls.mutable or not all(
+            Sentence.frozen(argument) for argument in arguments
+        ):
+            return cls.create(*arguments)
+        sentence = cls.interned.get(arguments)
+        if sentence is None:
+            sentence = cls.create(*arguments)
+            sentence._hash = hash((cls.__name__, sentence.arguments()))
+            cls.interned[sentence.arguments()] = sentence
+        return sentence
+
+    @classmethod
+    def create(cls, *arguments):
+        """Creates a new sentence without interning it."""
+        sentence = object.__new__(cls)
+        sentence._hash = None
+        sentence._symbols = None
+        sentence.setup(*arguments)
+        return sentence
+
+    @staticmethod
+    def frozen(argument):
+        """
+        Returns whether a sentence's argument can never change: anything
+        but a sentence, or an interned sentence.
+        """
+        return not isinstance(argument, Sentence) or argument._hash is not None
+
+    def setup(self):
+        """Sets the attributes of a new sentence from its arguments."""
+        pass
+
+    def arguments(self):
+        """Returns the arguments the sentence was constructed from."""
+        return ()
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return False
+
+        # Equal interned sentences are the same sentence
+        if self._hash is not None and other._hash is not None:
+            return False
+        return self.arguments() == other.arguments()
+
+    def __hash__(self):
+        if self._hash is None:
+            return hash((type(self).__name__, self.arguments()))
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.arguments())
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +96,88 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """
+        Returns a frozenset of all symbols in the logical sentence, which
+        is cached for interned sentences.
+        """
+        if self._symbols is None:
+
+            # Visit each distinct subformula once, stopping at any that
+            # already know their symbols
+            symbols = set()
+            visited = {id(self)}
+            stack = [self]
+            while stack:
+                sentence = stack.pop()
+                if isinstance(sentence, Symbol):
+                    symbols.add(sentence.name)
+                    continue
+                for argument in sentence.arguments():
+                    if id(argument) in visited:
+                        continue
+                    visited.add(id(argument))
+                    if argument._symbols is not None:
+                        symbols.update(argument._symbols)
+                    else:
+                        stack.append(argument)
+            if self._hash is None:
+                return frozenset(symbols)
+            self._symbols = frozenset(symbols)
+        return self._symbols
+
+    def source(self, positions):
+        """
+        Returns a Python expression for the sentence in terms of `m`, an
+        integer model whose bit `positions[name]` is the value of `name`.
+        """
+        raise Exception("nothing to compile")
+
+    def encode(self, cnf):
+        """
+        Adds clauses to `cnf` defining a literal equivalent to the sentence,
+        and returns that literal.
+        """
+        raise Exception("nothing to encode")
+
+    def substitute(self, values, cache=None):
+        """
+        Returns a simplified sentence in which each symbol in `values` is
+        replaced by its value, constants are folded away, and nested
+        conjunctions and disjunctions are flattened. A sentence that is
+        always true simplifies to And(), and one always false to Or().
+        A sentence with nothing to simplify is returned as it is.
+        `cache` maps sentences already simplified with the same values.
+        """
+        if cache is None:
+            cache = dict()
+        if self not in cache:
+            cache[self] = self.fold(values, cache)
+        return cache[self]
+
+    def fold(self, values, cache):
+        """Simplifies the sentence for `substitute`."""
+        raise Exception("nothing to simplify")
+
+    def compile(self, positions):
+        """
+        Compiles the sentence into a function of an integer model, whose
+        bit `positions[name]` holds the truth value of symbol `name`.
+        """
+        try:
+            return eval(f"lambda m: bool({self.source(positions)})")
+        except (SyntaxError, RecursionError, MemoryError):
+
+            # Sentence is nested too deeply to compile, so evaluate it
+            names = list(positions)
+
+            def evaluate(m):
+                return self.evaluate({
+                    name: bool(m >> positions[name] & 1) for name in names
+                })
+            return evaluate
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +207,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
+    def setup(self, name):
         self.name = name
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def arguments(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -65,20 +227,32 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def symbol_set(self):
+        if self._symbols is None:
+            self._symbols = frozenset([self.name])
+        return self._symbols
+
+    def source(self, positions):
+        return f"(m >> {positions[self.name]} & 1)"
+
+    def encode(self, cnf):
+        return cnf.variable(self.name)
+
+    def fold(self, values, cache):
+        if self.name in values:
+            return constant(values[self.name])
+        return self
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def setup(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def arguments(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +263,32 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+
+    def source(self, positions):
+        return f"(not {self.operand.source(positions)})"
+
+    def encode(self, cnf):
+        return -cnf.literal(self.operand)
+
+    def fold(self, values, cache):
+        operand = self.operand.substitute(values, cache)
+        if (operand is self.operand and truth(operand) is None
+                and not isinstance(operand, Not)):
+            return self
+        return negate(operand)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+    mutable = True
+
+    def setup(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def arguments(self):
+        return tuple(self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -126,23 +309,54 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+
+    def source(self, positions):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.source(positions) for conjunct in self.conjuncts
+        ) + ")"
+
+    def encode(self, cnf):
+        if not self.conjuncts:
+            return cnf.true()
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        x = cnf.solver.new_var()
+        for literal in literals:
+            cnf.clause(-x, literal)
+        cnf.clause(x, *[-literal for literal in literals])
+        return x
+
+    def fold(self, values, cache):
+        conjuncts = dict()
+        for conjunct in self.conjuncts:
+            conjunct = conjunct.substitute(values, cache)
+            if truth(conjunct) is False:
+                return conjunct
+            parts = conjunct.conjuncts if isinstance(conjunct, And) else [
+                conjunct
+            ]
+            for part in parts:
+                if negate(part) in conjuncts:
+                    return Or()
+                conjuncts[part] = True
+        if len(conjuncts) == 1:
+            return next(iter(conjuncts))
+        if unchanged(self.conjuncts, conjuncts):
+            return self
+        return And(*conjuncts)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def setup(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        self.disjuncts = disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def arguments(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +371,55 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+
+    def source(self, positions):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.source(positions) for disjunct in self.disjuncts
+        ) + ")"
+
+    def encode(self, cnf):
+        if not self.disjuncts:
+            return -cnf.true()
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        x = cnf.solver.new_var()
+        for literal in literals:
+            cnf.clause(x, -literal)
+        cnf.clause(-x, *literals)
+        return x
+
+    def fold(self, values, cache):
+        disjuncts = dict()
+        for disjunct in self.disjuncts:
+            disjunct = disjunct.substitute(values, cache)
+            if truth(disjunct) is True:
+                return disjunct
+            parts = disjunct.disjuncts if isinstance(disjunct, Or) else [
+                disjunct
+            ]
+            for part in parts:
+                if negate(part) in disjuncts:
+                    return And()
+                disjuncts[part] = True
+        if len(disjuncts) == 1:
+            return next(iter(disjuncts))
+        if unchanged(self.disjuncts, disjuncts):
+            return self
+        return Or(*disjuncts)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def setup(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +433,48 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+
+    def source(self, positions):
+        antecedent = self.antecedent.source(positions)
+        consequent = self.consequent.source(positions)
+        return f"((not {antecedent}) or {consequent})"
+
+    def encode(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        x = cnf.solver.new_var()
+        cnf.clause(-x, -a, b)
+        cnf.clause(x, a)
+        cnf.clause(x, -b)
+        return x
+
+    def fold(self, values, cache):
+        antecedent = self.antecedent.substitute(values, cache)
+        consequent = self.consequent.substitute(values, cache)
+        if truth(antecedent) is False or truth(consequent) is True:
+            return And()
+        if truth(antecedent) is True:
+            return consequent
+        if truth(consequent) is False:
+            return negate(antecedent)
+        if antecedent == consequent:
+            return And()
+        if unchanged(self.arguments(), [antecedent, consequent]):
+            return self
+        return Implication(antecedent, consequent)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def setup(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def arguments(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,43 +490,387 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def source(self, positions):
+        left = self.left.source(positions)
+        right = self.right.source(positions)
+        return f"(bool({left}) == bool({right}))"
+
+    def encode(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        x = cnf.solver.new_var()
+        cnf.clause(-x, -a, b)
+        cnf.clause(-x, a, -b)
+        cnf.clause(x, a, b)
+        cnf.clause(x, -a, -b)
+        return x
+
+    def fold(self, values, cache):
+        left = self.left.substitute(values, cache)
+        right = self.right.substitute(values, cache)
+        for a, b in [(left, right), (right, left)]:
+            if truth(a) is True:
+                return b
+            if truth(a) is False:
+                return negate(b)
+        if left == right:
+            return And()
+        if negate(left) == right:
+            return Or()
+        if unchanged(self.arguments(), [left, right]):
+            return self
+        return Biconditional(left, right)
+
+
+def constant(value):
+    """Returns a sentence that is always `value`."""
+    return And() if value else Or()
+
+
+def truth(sentence):
+    """
+    Returns True or False for a constant sentence, as made by `constant`,
+    and None for any other sentence.
+    """
+    if isinstance(sentence, And) and not sentence.conjuncts:
+        return True
+    if isinstance(sentence, Or) and not sentence.disjuncts:
+        return False
+    return None
+
+
+def unchanged(arguments, simplified):
+    """
+    Returns whether `simplified` holds exactly the sentences in
+    `arguments`, in the same order.
+    """
+    return len(arguments) == len(simplified) and all(
+        a is b for a, b in zip(arguments, simplified)
+    )
+
+
+def negate(sentence):
+    """Returns the simplified negation of an already simplified sentence."""
+    if truth(sentence) is not None:
+        return constant(not truth(sentence))
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def simplify(knowledge):
+    """
+    Simplifies a knowledge base by folding constants, flattening nested
+    conjunctions and disjunctions, and unit propagation.
+
+    Returns the reduced knowledge base and a dictionary of the values it
+    forces on symbols, which no longer appear in the reduced knowledge
+    base. The knowledge base is equivalent to the reduced one together
+    with the forced values. If it is inconsistent, it reduces to Or().
+    """
+    forced = dict()
+    conjuncts = dict()
+    count = 0
+
+    # Indices of the kept conjuncts that mention each symbol
+    mentions = dict()
+
+    pending = [knowledge]
+    while pending:
+        sentence = pending.pop().substitute(forced)
+        if truth(sentence) is True:
+            continue
+        if truth(sentence) is False:
+            return sentence, forced
+        if isinstance(sentence, And):
+            pending.extend(reversed(sentence.conjuncts))
+            continue
+
+        # A unit literal forces a value, which simplifies every conjunct
+        # that mentions its symbol again
+        literal = sentence.operand if isinstance(sentence, Not) else sentence
+        if isinstance(literal, Symbol):
+            forced[literal.name] = literal is sentence
+            for i in sorted(mentions.pop(literal.name, ()), reverse=True):
+                if i in conjuncts:
+                    pending.append(conjuncts.pop(i))
+            continue
+
+        conjuncts[count] = sentence
+        for name in sentence.symbol_set():
+            mentions.setdefault(name, set()).add(count)
+        count += 1
+
+    if len(conjuncts) == 1:
+        return next(iter(conjuncts.values())), forced
+    if isinstance(knowledge, And) and unchanged(
+        knowledge.conjuncts, list(conjuncts.values())
+    ):
+        return knowledge, forced
+    return And(*conjuncts.values()), forced
+
+
+class CNF():
+
+    def __init__(self, solver=None):
+        """
+        Tseitin encoding of sentences as clauses of a SAT solver.
+
+        Each symbol becomes a solver variable, and each compound sentence
+        a fresh variable with clauses making it equivalent to the sentence,
+        so the clauses grow linearly with the size of the sentence.
+        Sentences that appear more than once are only encoded once.
+        """
+        self.solver = solver if solver is not None else sat.Solver()
+        self.clauses = []
+        self.variables = dict()
+        self.literals = dict()
+        self.constant = None
+
+    def variable(self, name):
+        """Returns the solver variable for symbol `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def true(self):
+        """Returns a literal that is always true."""
+        if self.constant is None:
+            self.constant = self.solver.new_var()
+            self.clause(self.constant)
+        return self.constant
+
+    def clause(self, *literals):
+        """Adds a clause to the solver."""
+        self.clauses.append(literals)
+        self.solver.add_clause(literals)
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to `sentence`."""
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.encode(self)
+        return self.literals[sentence]
+
+    def add(self, sentence):
+        """Adds clauses making `sentence` true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clause(*[self.literal(disjunct)
+                          for disjunct in sentence.disjuncts])
         else:
+            self.clause(self.literal(sentence))
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    def model(self):
+        """
+        Returns the values of the symbols in the solver's last model.
+        """
+        return {name: self.solver.model[v]
+                for name, v in self.variables.items()}
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+def model_check(knowledge, query, method=None, preprocess=True):
+    """Checks if knowledge base entails query."""
+    return check_all(knowledge, [query], method, preprocess)[0]
+
+
+def check_all(knowledge, queries, method=None, preprocess=True):
+    """
+    Checks which of `queries` the knowledge base entails, returning a list
+    of booleans in the same order. The models of the knowledge base are
+    only searched once, however many queries there are.
+
+    `method` is "enumerate", to check every model, "parallel", to check
+    every model split across processes, or "sat", to search for models of
+    the knowledge base with a SAT solver. By default, small problems are
+    enumerated.
+
+    If `preprocess` is True, the knowledge base is simplified first, so
+    only symbols it does not force need to be searched.
+    """
+    queries = list(queries)
+    if preprocess:
+        knowledge, forced = simplify(knowledge)
+        if truth(knowledge) is False:
+            return [True] * len(queries)
+        cache = dict()
+        queries = [query.substitute(forced, cache) for query in queries]
+    if method is None:
+        symbols = knowledge.symbol_set().union(
+            *[query.symbol_set() for query in queries]
+        )
+        method = "enumerate" if len(symbols) <= ENUMERATION_LIMIT else "sat"
+    if method == "enumerate":
+        return enumeration_check(knowledge, queries)
+    elif method == "parallel":
+        return parallel_check(knowledge, queries)
+    elif method == "sat":
+        return sat_check(knowledge, queries)
+    raise ValueError(f"unknown method {method}")
+
+
+def enumeration_check(knowledge, queries):
+    """Checks which queries knowledge base entails by checking every model."""
+
+    positions = bit_positions(knowledge, queries)
+
+    # Compile every sentence into a function of an integer model
+    knowledge = knowledge.compile(positions)
+    compiled = [query.compile(positions) for query in queries]
+
+    refuted = counter_models(knowledge, compiled, range(1 << len(positions)))
+    return [i not in refuted for i in range(len(queries))]
+
+
+def bit_positions(knowledge, queries):
+    """
+    Gives each symbol in knowledge and queries a bit of an integer model.
+    """
+    symbols = sorted(knowledge.symbol_set().union(
+        *[query.symbol_set() for query in queries]
+    ))
+    return {symbol: i for i, symbol in enumerate(symbols)}
+
+
+def counter_models(knowledge, queries, models):
+    """
+    Returns the set of indices of compiled `queries` that are false in
+    some model in `models` in which compiled `knowledge` is true.
+    """
+
+    # Count through every model; if knowledge base is true in a model,
+    # then every entailed query must also be true
+    refuted = set()
+    remaining = set(range(len(queries)))
+    for model in models:
+        if not remaining:
+            break
+        if knowledge(model):
+            for i in list(remaining):
+                if not queries[i](model):
+                    refuted.add(i)
+                    remaining.remove(i)
+    return refuted
+
+
+def parallel_check(knowledge, queries, processes=None):
+    """
+    Checks which queries knowledge base entails by checking every model,
+    split across `processes` processes (by default, one per CPU).
+
+    The highest bits of the model, the last symbols in order, are fixed
+    to split the models into a few slices per process. Processes stop as
+    soon as a counter-model has been found for every query.
+    """
+    queries = list(queries)
+    positions = bit_positions(knowledge, queries)
+    if not queries:
+        return []
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    # Split on enough symbols to give each process a few slices
+    fixed = min(len(positions), (4 * processes - 1).bit_length())
+    size = 1 << (len(positions) - fixed)
+    slices = [(i * size, (i + 1) * size) for i in range(1 << fixed)]
+
+    entailed = [True] * len(queries)
+    remaining = len(queries)
+    with multiprocessing.Pool(
+        processes, initializer=parallel_init,
+        initargs=(knowledge, queries, positions)
+    ) as pool:
+        for refuted in pool.imap_unordered(parallel_slice, slices):
+            for i in refuted:
+                if entailed[i]:
+                    entailed[i] = False
+                    remaining -= 1
+            if not remaining:
+                break
+    return entailed
+
+
+# Compiled knowledge base and queries for this worker process
+parallel_sentences = None
+
+
+def parallel_init(knowledge, queries, positions):
+    """Compile the sentences once in each worker process."""
+    global parallel_sentences
+    parallel_sentences = (
+        knowledge.compile(positions),
+        [query.compile(positions) for query in queries]
+    )
+
+
+def parallel_slice(bounds):
+    """Return the queries refuted by a slice of models in a worker process."""
+    knowledge, queries = parallel_sentences
+    return counter_models(knowledge, queries, range(*bounds))
+
+
+def sat_check(knowledge, queries):
+    """
+    Checks which queries knowledge base entails with a SAT solver.
+
+    Any model of the knowledge base rules out the queries false in it, so
+    the solver only has to look for a counter-model of each query that is
+    true in every model found so far, and each one it finds may rule out
+    several queries at once.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    entailed = [True] * len(queries)
+    remaining = list(range(len(queries)))
+    while remaining:
+        i = remaining.pop()
+        if not cnf.solver.solve([-literals[i]]):
+            continue
+        model = cnf.solver.model
+        entailed[i] = False
+        for j in list(remaining):
+            if model[abs(literals[j])] != (literals[j] > 0):
+                entailed[j] = False
+                remaining.remove(j)
+    return entailed
+
+
+def model_count(knowledge, symbols=()):
+    """
+    Returns the number of models of the knowledge base: assignments to its
+    symbols, and to any other names in `symbols`, in which it is true.
+    """
+    names = knowledge.symbol_set().union(symbols)
+    knowledge, forced = simplify(knowledge)
+    if truth(knowledge) is False:
+        return 0
+    cnf = CNF()
+    cnf.add(knowledge)
+    free = len(names) - len(forced) - len(knowledge.symbol_set())
+    return sat.ModelCounter().count(cnf.clauses) << free
+
+
+def models(knowledge, symbols=()):
+    """
+    Lazily yields each model of the knowledge base, over its symbols and
+    any other names in `symbols`, as a dictionary from name to value.
+    """
+    names = knowledge.symbol_set().union(symbols)
+    knowledge, forced = simplify(knowledge)
+    if truth(knowledge) is False:
+        return
+    cnf = CNF()
+    cnf.add(knowledge)
+    searched = sorted(knowledge.symbol_set())
+    free = sorted(names - forced.keys() - set(searched))
+    variables = [cnf.variable(name) for name in searched]
+
+    for model in sat.ModelCounter().models(cnf.clauses, variables):
+        values = dict(forced)
+        for name, v in zip(searched, variables):
+            values[name] = model[v]
+        for choice in itertools.product((False, True), repeat=len(free)):
+            yield dict(values, **dict(zip(free, choice)))
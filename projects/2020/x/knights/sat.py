@@ -0,0 +1,485 @@
+import collections
+import heapq
+import itertools
+
+
+class Solver():
+    """
+    A conflict-driven clause learning (CDCL) SAT solver.
+
+    Variables are positive integers from `new_var`, and a literal is a
+    variable for its positive form or its negation for its negative form.
+    Clauses are lists of literals. The solver can be asked to solve again
+    under different assumptions, keeping the clauses it has learned.
+    """
+
+    def __init__(self):
+        self.variables = 0
+        self.ok = True
+
+        # Clauses, and the clauses watching each literal
+        self.clauses = []
+        self.watches = {}
+
+        # Current assignment: value, decision level and reason clause of
+        # each variable, in the order they were assigned
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # Decision heuristic: activity of each variable, with a heap of
+        # candidates, and the last value each variable had
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.heap = []
+        self.polarity = [False]
+
+        self.model = None
+        self.conflicts = 0
+
+    def new_var(self):
+        """Add a new variable and return it."""
+        self.variables += 1
+        v = self.variables
+        self.value.append(None)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(False)
+        self.watches[v] = []
+        self.watches[-v] = []
+        heapq.heappush(self.heap, (0.0, v))
+        return v
+
+    def literal_value(self, literal):
+        """Return True, False or None for the current value of `literal`."""
+        value = self.value[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, literals):
+        """
+        Add a clause, given as an iterable of literals.
+        Return False if the clauses are now known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in set(literals):
+            if -literal in clause:
+                return True
+            value = self.literal_value(literal)
+            if value is True:
+                return True
+            if value is None:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        """Store a clause of two or more literals, watching the first two."""
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        """Make `literal` true at the current decision level."""
+        v = abs(literal)
+        self.value[v] = literal > 0
+        self.level[v] = len(self.limits)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Propagate unit clauses. Return a conflicting clause, or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            kept = []
+            conflict = None
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+
+                # Make sure the false literal is the second watch
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if self.literal_value(first) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    if self.literal_value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.literal_value(first) is False:
+                        conflict = clause
+                        kept.extend(watching[i:])
+                        break
+                    self.assign(first, clause)
+
+            self.watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Find the first unique implication point of a conflict.
+        Return the learned clause, asserting literal first, and the level
+        to backtrack to.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                v = abs(other)
+                if v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Walk back to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learned)),
+                      key=lambda k: self.level[abs(learned[k])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, v):
+        """Increase the activity of variable `v`."""
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u)
+                         for u in range(1, self.variables + 1)
+                         if self.value[u] is None]
+            heapq.heapify(self.heap)
+        if self.value[v] is None:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def backtrack(self, level):
+        """Undo every assignment made above decision `level`."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.polarity[v] = self.value[v]
+            self.value[v] = None
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """
+        Return the unassigned variable with the highest activity, or None
+        if every variable is assigned.
+        """
+        while self.heap:
+            activity, v = heapq.heappop(self.heap)
+            if self.value[v] is None and -activity == self.activity[v]:
+                return v
+        for v in range(1, self.variables + 1):
+            if self.value[v] is None:
+                return v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Return True if the clauses are satisfiable with every literal in
+        `assumptions` true, storing a satisfying assignment in `model`;
+        return False otherwise.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        assumptions = list(assumptions)
+        restart = 1
+        budget = 100 * luby(restart)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                budget -= 1
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.attach(learned)
+                    self.assign(learned[0], learned)
+                self.increment *= 1 / 0.95
+                continue
+
+            # Restart now and then, keeping what was learned
+            if budget <= 0:
+                self.backtrack(0)
+                restart += 1
+                budget = 100 * luby(restart)
+                continue
+
+            # Decide assumptions first, then the most active variable
+            level = len(self.limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.literal_value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            v = self.decide()
+            if v is None:
+                self.model = list(self.value)
+                self.backtrack(0)
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(v if self.polarity[v] else -v, None)
+
+
+def luby(i):
+    """Return the `i`th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if (1 << k) - 1 == i:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+class ModelCounter():
+    """
+    Counts and lists the models of sets of clauses, given as iterables of
+    literals as for `Solver`.
+
+    Counting splits the clauses into components that share no variables,
+    whose counts multiply, and caches the count of every component, so
+    subproblems reached by different assignments are only counted once.
+    The cache is kept between calls.
+    """
+
+    def __init__(self):
+        self.cache = dict()
+
+    def count(self, clauses):
+        """
+        Return the number of assignments to the variables of `clauses`
+        that satisfy all of them.
+        """
+        clauses = [list(clause) for clause in clauses]
+        variables = variables_of(clauses)
+        clauses = prepare(clauses)
+        units = [literal for clause in clauses if len(clause) == 1
+                 for literal in clause]
+        return self.branch(clauses, variables, units)
+
+    def branch(self, clauses, variables, literals):
+        """
+        Return the number of assignments to `variables`, which include
+        every variable of `clauses`, that satisfy the clauses with every
+        literal in `literals` true.
+        """
+        clauses, true = propagate(clauses, literals)
+        if clauses is None:
+            return 0
+        free = len(variables) - len(true) - len(variables_of(clauses))
+        total = 1 << free
+        for component in components(clauses):
+            total *= self.component(component)
+            if not total:
+                break
+        return total
+
+    def component(self, clauses):
+        """Return the number of models of a component's variables."""
+        if clauses not in self.cache:
+            variables = variables_of(clauses)
+            v = choose(clauses)
+            self.cache[clauses] = (self.branch(clauses, variables, [v])
+                                   + self.branch(clauses, variables, [-v]))
+        return self.cache[clauses]
+
+    def models(self, clauses, variables):
+        """
+        Lazily yield each assignment to `variables` that extends to a
+        model of `clauses`, as a dictionary from variable to value.
+
+        Every other variable of the clauses must be determined by
+        `variables`, as Tseitin variables are, or assignments that extend
+        in more than one way will be repeated.
+        """
+        clauses = prepare(clauses)
+        units = [literal for clause in clauses if len(clause) == 1
+                 for literal in clause]
+        yield from self.extend(clauses, dict(), units, list(variables))
+
+    def extend(self, clauses, assignment, literals, variables):
+        """
+        Yield models of `variables` extending `assignment` with every
+        literal in `literals` true.
+        """
+        clauses, true = propagate(clauses, literals)
+        if clauses is None:
+            return
+        assignment = dict(assignment)
+        for literal in true:
+            assignment[abs(literal)] = literal > 0
+
+        # Every clause is satisfied, so unassigned variables are free
+        if not clauses:
+            free = [v for v in variables if v not in assignment]
+            fixed = {v: assignment[v] for v in variables if v in assignment}
+            for values in itertools.product((False, True), repeat=len(free)):
+                model = dict(fixed)
+                model.update(zip(free, values))
+                yield model
+            return
+
+        v = choose(clauses)
+        for literal in (v, -v):
+            yield from self.extend(clauses, assignment, [literal], variables)
+
+
+def prepare(clauses):
+    """
+    Return clauses as a frozenset of frozensets, without tautologies.
+    """
+    prepared = set()
+    for clause in clauses:
+        clause = frozenset(clause)
+        if not any(-literal in clause for literal in clause):
+            prepared.add(clause)
+    return frozenset(prepared)
+
+
+def variables_of(clauses):
+    """Return the set of variables in `clauses`."""
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def propagate(clauses, literals):
+    """
+    Make every literal in `literals` true and propagate unit clauses.
+    Return the remaining clauses, with false literals removed, and the set
+    of literals made true, or (None, None) on a conflict.
+    """
+    true = set()
+    pending = list(literals)
+    while pending:
+        literal = pending.pop()
+        if literal in true:
+            continue
+        if -literal in true:
+            return None, None
+        true.add(literal)
+        remaining = set()
+        for clause in clauses:
+            if literal in clause:
+                continue
+            if -literal in clause:
+                clause = clause - {-literal}
+                if not clause:
+                    return None, None
+                if len(clause) == 1:
+                    pending.extend(clause)
+            remaining.add(clause)
+        clauses = frozenset(remaining)
+    return clauses, true
+
+
+def components(clauses):
+    """Split clauses into groups that share no variables."""
+    occurrences = collections.defaultdict(list)
+    for clause in clauses:
+        for literal in clause:
+            occurrences[abs(literal)].append(clause)
+
+    groups = []
+    seen = set()
+    visited = set()
+    for clause in clauses:
+        if clause in seen:
+            continue
+        seen.add(clause)
+        group = [clause]
+        for member in group:
+            for literal in member:
+                v = abs(literal)
+                if v in visited:
+                    continue
+                visited.add(v)
+                for other in occurrences[v]:
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+        groups.append(frozenset(group))
+    return groups
+
+
+def choose(clauses):
+    """Return the variable that appears in the most clauses."""
+    occurrences = collections.Counter(
+        abs(literal) for clause in clauses for literal in clause
+    )
+    return min(occurrences, key=lambda v: (-occurrences[v], v))